@@ -0,0 +1,79 @@
+"""
+Breakup-AI RAG Service
+Builds the RAG agent the way workers run it
+
+The service lifespan and offline jobs that fill worker caches (prewarm)
+share these helpers, so cached retrieval results are ranked exactly as a
+worker would rank them cold.
+"""
+
+import logging
+import os
+from concurrent.futures import Executor
+from typing import Optional
+
+from clients import BackendClients, LazyCrossEncoder
+from cascade import JurisdictionCascade
+from config import load_rag_config
+from rag_agent import LegalRAGAgent
+from snapshot import SnapshotManager
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_reranker() -> Optional[LazyCrossEncoder]:
+    """Cross-encoder used for reranking, or None when RERANKER_MODEL is unset"""
+    model_name = os.getenv("RERANKER_MODEL")
+    if not model_name:
+        return None
+    # Loaded on the first rerank so it doesn't hold up worker startup
+    return LazyCrossEncoder(model_name)
+
+
+def load_index_snapshots(fallback=None) -> Optional[SnapshotManager]:
+    """
+    Local index snapshots from INDEX_SNAPSHOT_DIR or vector_database.index_snapshots
+
+    None when snapshots are not configured. Otherwise the manager is
+    returned even before a version has been published; it searches
+    ``fallback`` until its watcher opens one.
+    """
+    snapshot_config = load_rag_config().get("vector_database", {}).get("index_snapshots", {})
+    root = os.getenv("INDEX_SNAPSHOT_DIR") or (
+        snapshot_config.get("path") if snapshot_config.get("enabled") else None
+    )
+    if not root:
+        return None
+    snapshots = SnapshotManager(root, fallback=fallback)
+    # Opening a version only maps files, so this is cheap
+    try:
+        snapshots.refresh()
+    except Exception:
+        logger.exception("Failed to open index snapshot under %s", root)
+    if snapshots.current is None:
+        logger.warning("No index snapshot open under %s; searching Pinecone until one is published", root)
+    return snapshots
+
+
+def create_rag_agent(
+    clients: BackendClients,
+    executor: Optional[Executor] = None,
+    bundles=None,
+    caches=None
+) -> LegalRAGAgent:
+    """Agent over ``clients`` with the configured reranker and jurisdiction cascade"""
+    return LegalRAGAgent(
+        vector_db_client=clients.vector_db,
+        metadata_db_client=clients.metadata_db,
+        graph_db_client=clients.graph_db,
+        embedding_model=clients.embedder,
+        llm_model=clients.llm,
+        executor=executor,
+        reranker=load_reranker(),
+        bundles=bundles,
+        caches=caches,
+        cascade=JurisdictionCascade.from_config(
+            load_rag_config().get("retrieval", {}).get("filters")
+        )
+    )
@@ -0,0 +1,273 @@
+"""
+Breakup-AI RAG Service
+Materialized per-state procedure and evidence bundles
+
+Procedures and evidence requirements only change when forms or statutes are
+re-ingested, so ingestion precompiles them into a versioned JSON snapshot
+keyed by (procedure/claim type, state). Workers load the snapshot into a
+read-only map and poll the file, so a rebuilt or invalidated snapshot is
+picked up by every worker without a restart.
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from rag_agent import (
+    EvidenceRequirements,
+    Jurisdiction,
+    JurisdictionLevel,
+    LegalRAGAgent,
+    Procedure
+)
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+# Which bundle kinds each ingestion update makes stale
+INVALIDATES = {
+    "forms": ("procedures",),
+    "statutes": ("procedures", "evidence")
+}
+
+
+def _key(kind: str, state: str) -> str:
+    return f"{kind}|{state.upper()}"
+
+
+def _split_key(key: str) -> Tuple[str, str]:
+    kind, state = key.rsplit("|", 1)
+    return kind, state
+
+
+def _procedure_to_dict(procedure: Procedure) -> Dict[str, Any]:
+    data = dataclasses.asdict(procedure)
+    data["jurisdiction"] = procedure.jurisdiction.state
+    return data
+
+
+def _procedure_from_dict(data: Dict[str, Any]) -> Procedure:
+    return Procedure(**dict(
+        data,
+        jurisdiction=Jurisdiction.intern(JurisdictionLevel.STATE, state=data["jurisdiction"])
+    ))
+
+
+def _evidence_to_dict(evidence: EvidenceRequirements) -> Dict[str, Any]:
+    data = dataclasses.asdict(evidence)
+    data["jurisdiction"] = evidence.jurisdiction.state
+    return data
+
+
+def _evidence_from_dict(data: Dict[str, Any]) -> EvidenceRequirements:
+    return EvidenceRequirements(**dict(
+        data,
+        jurisdiction=Jurisdiction.intern(JurisdictionLevel.STATE, state=data["jurisdiction"])
+    ))
+
+
+class BundleStore:
+    """Read-only in-memory view of the latest bundle snapshot"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version: Optional[str] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._procedures: MappingProxyType = MappingProxyType({})
+        self._evidence: MappingProxyType = MappingProxyType({})
+        try:
+            self.refresh()
+        except Exception:
+            # Serve live lookups until watch() finds a readable snapshot
+            logger.exception("Bundle snapshot load failed for %s", self.path)
+
+    def refresh(self) -> bool:
+        """Reload if the snapshot file changed; returns True when reloaded"""
+        try:
+            stat = os.stat(self.path)
+            # os.replace() in write_snapshot() always yields a new inode
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._stamp:
+            return False
+
+        snapshot = read_snapshot(self.path) if stamp is not None else {}
+        procedures = {
+            _split_key(key): _procedure_from_dict(data)
+            for key, data in snapshot.get("procedures", {}).items()
+        }
+        evidence = {
+            _split_key(key): _evidence_from_dict(data)
+            for key, data in snapshot.get("evidence", {}).items()
+        }
+
+        # Swap whole maps so concurrent readers never see a partial reload
+        self._procedures = MappingProxyType(procedures)
+        self._evidence = MappingProxyType(evidence)
+        self.version = snapshot.get("version")
+        self._stamp = stamp
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """Poll for snapshot changes until cancelled; a bad snapshot keeps the current one"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception("Bundle snapshot refresh failed for %s", self.path)
+
+    def procedure(self, procedure_type: str, state: str) -> Optional[Procedure]:
+        """Precompiled procedure, or None when not bundled (or invalidated)"""
+        procedure = self._procedures.get((procedure_type, state.upper()))
+        return dataclasses.replace(procedure) if procedure is not None else None
+
+    def evidence(self, claim_type: str, state: str) -> Optional[EvidenceRequirements]:
+        """Precompiled evidence requirements, or None when not bundled"""
+        evidence = self._evidence.get((claim_type, state.upper()))
+        return dataclasses.replace(evidence) if evidence is not None else None
+
+    def __len__(self) -> int:
+        return len(self._procedures) + len(self._evidence)
+
+
+def read_snapshot(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        snapshot = json.load(f)
+    if snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported bundle snapshot format in {path}")
+    return snapshot
+
+
+def write_snapshot(path: str, snapshot: Dict[str, Any]) -> str:
+    """Stamp a content version and atomically replace the snapshot file"""
+    body = {
+        "procedures": snapshot.get("procedures", {}),
+        "evidence": snapshot.get("evidence", {})
+    }
+    digest = hashlib.sha256(
+        json.dumps(body, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    snapshot = dict(
+        body,
+        format=SNAPSHOT_FORMAT,
+        version=digest,
+        built_at=snapshot.get("built_at") or datetime.utcnow().isoformat()
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, default=str)
+    os.replace(tmp_path, path)
+    return digest
+
+
+async def build_snapshot(
+    agent: LegalRAGAgent,
+    procedure_types: Iterable[str],
+    claim_types: Iterable[str],
+    states: Iterable[str],
+    concurrency: int = 8
+) -> Dict[str, Any]:
+    """
+    Compile every (type, state) bundle from the live data sources
+
+    ``agent`` must not itself be backed by a BundleStore, otherwise stale
+    bundles would be copied into the new snapshot. A bundle that fails to
+    compile is logged and left out; its key is listed under "failed" so
+    merge_snapshot() keeps the previous entry.
+    """
+    states = [state.upper() for state in states]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def compile_one(coro):
+        async with semaphore:
+            return await coro
+
+    procedure_keys = [(kind, state) for kind in procedure_types for state in states]
+    evidence_keys = [(kind, state) for kind in claim_types for state in states]
+    procedures, evidence = await asyncio.gather(
+        asyncio.gather(*[
+            compile_one(agent.aget_procedure(kind, state)) for kind, state in procedure_keys
+        ], return_exceptions=True),
+        asyncio.gather(*[
+            compile_one(agent.aget_evidence_requirements(kind, state)) for kind, state in evidence_keys
+        ], return_exceptions=True)
+    )
+
+    failed = []
+    for kinds, keys, results in (
+        ("procedures", procedure_keys, procedures),
+        ("evidence", evidence_keys, evidence)
+    ):
+        for (kind, state), result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.warning("Skipping %s bundle %s/%s: %r", kinds, kind, state, result)
+                failed.append(_key(kind, state))
+
+    return {
+        "procedures": {
+            _key(kind, state): _procedure_to_dict(procedure)
+            for (kind, state), procedure in zip(procedure_keys, procedures)
+            if procedure is not None and not isinstance(procedure, Exception)
+        },
+        "evidence": {
+            _key(kind, state): _evidence_to_dict(requirements)
+            for (kind, state), requirements in zip(evidence_keys, evidence)
+            if requirements is not None and not isinstance(requirements, Exception)
+        },
+        "failed": failed
+    }
+
+
+def merge_snapshot(path: str, snapshot: Dict[str, Any], states: Iterable[str]) -> Dict[str, Any]:
+    """
+    Replace only ``states`` in the existing snapshot with a partial build
+
+    Entries for other states, and for keys the build failed to compile,
+    are kept; entries for the rebuilt states that the new build no longer
+    produces are dropped.
+    """
+    if not os.path.exists(path):
+        return snapshot
+    existing = read_snapshot(path)
+    states = {state.upper() for state in states}
+    failed = set(snapshot.get("failed", ()))
+    merged = {}
+    for kind in ("procedures", "evidence"):
+        merged[kind] = {
+            key: data for key, data in existing.get(kind, {}).items()
+            if _split_key(key)[1] not in states or key in failed
+        }
+        merged[kind].update(snapshot.get(kind, {}))
+    return merged
+
+
+def invalidate_snapshot(path: str, update: str, states: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Drop bundles made stale by a forms or statutes update
+
+    Dropped entries fall back to live lookups until the next build.
+    Returns the new version, or None when no snapshot has been built yet.
+    """
+    if not os.path.exists(path):
+        return None
+    snapshot = read_snapshot(path)
+    states = {state.upper() for state in states} if states else None
+    for kind in INVALIDATES[update]:
+        snapshot[kind] = {
+            key: data for key, data in snapshot.get(kind, {}).items()
+            if states is not None and _split_key(key)[1] not in states
+        }
+    snapshot["built_at"] = None
+    return write_snapshot(path, snapshot)
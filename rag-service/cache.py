@@ -0,0 +1,98 @@
+"""
+Breakup-AI RAG Service
+In-process TTL/LRU caches shared by the agent and service
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after ``ttl_seconds``
+
+    Safe to use from the event loop and from executor threads.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], **defaults) -> "TTLCache":
+        settings = dict(defaults, **(config or {}))
+        return cls(settings["max_entries"], settings["ttl_seconds"])
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Unexpired entries, least recently used first"""
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._entries.items())
+        return ((key, value) for key, (expires, value) in entries if expires >= now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+@dataclass
+class AgentCaches:
+    """Caches consulted by LegalRAGAgent on the async path"""
+    embeddings: TTLCache
+    retrieval: TTLCache
+    plain_language: TTLCache
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "AgentCaches":
+        config = config or {}
+        return cls(
+            embeddings=TTLCache.from_config(
+                config.get("embeddings"), max_entries=50000, ttl_seconds=86400
+            ),
+            retrieval=TTLCache.from_config(
+                config.get("retrieval"), max_entries=10000, ttl_seconds=3600
+            ),
+            plain_language=TTLCache.from_config(
+                config.get("plain_language"), max_entries=20000, ttl_seconds=86400
+            )
+        )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "embeddings": self.embeddings.stats(),
+            "retrieval": self.retrieval.stats(),
+            "plain_language": self.plain_language.stats()
+        }
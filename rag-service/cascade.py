@@ -0,0 +1,202 @@
+"""
+Breakup-AI RAG Service
+Cascaded jurisdiction-priority retrieval
+
+Vector search runs tier by tier in retrieval.filters.jurisdiction.priority
+order (user's state, then federal, then neighboring states) and stops as
+soon as a query has enough confident hits. Most questions are answered
+in-state, so the wider tiers are only searched when the state's own law
+comes up short. Each hit's score is weighted by its tier and by the
+recency and authority preferences in the same pass.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+
+FEDERAL = "federal"
+
+# States (and DC) sharing a land border; corner-only contacts are excluded
+STATE_NEIGHBORS: Dict[str, Tuple[str, ...]] = {
+    "AK": (),
+    "AL": ("FL", "GA", "MS", "TN"),
+    "AR": ("LA", "MO", "MS", "OK", "TN", "TX"),
+    "AZ": ("CA", "NM", "NV", "UT"),
+    "CA": ("AZ", "NV", "OR"),
+    "CO": ("KS", "NE", "NM", "OK", "UT", "WY"),
+    "CT": ("MA", "NY", "RI"),
+    "DC": ("MD", "VA"),
+    "DE": ("MD", "NJ", "PA"),
+    "FL": ("AL", "GA"),
+    "GA": ("AL", "FL", "NC", "SC", "TN"),
+    "HI": (),
+    "IA": ("IL", "MN", "MO", "NE", "SD", "WI"),
+    "ID": ("MT", "NV", "OR", "UT", "WA", "WY"),
+    "IL": ("IA", "IN", "KY", "MO", "WI"),
+    "IN": ("IL", "KY", "MI", "OH"),
+    "KS": ("CO", "MO", "NE", "OK"),
+    "KY": ("IL", "IN", "MO", "OH", "TN", "VA", "WV"),
+    "LA": ("AR", "MS", "TX"),
+    "MA": ("CT", "NH", "NY", "RI", "VT"),
+    "MD": ("DC", "DE", "PA", "VA", "WV"),
+    "ME": ("NH",),
+    "MI": ("IN", "OH", "WI"),
+    "MN": ("IA", "ND", "SD", "WI"),
+    "MO": ("AR", "IA", "IL", "KS", "KY", "NE", "OK", "TN"),
+    "MS": ("AL", "AR", "LA", "TN"),
+    "MT": ("ID", "ND", "SD", "WY"),
+    "NC": ("GA", "SC", "TN", "VA"),
+    "ND": ("MN", "MT", "SD"),
+    "NE": ("CO", "IA", "KS", "MO", "SD", "WY"),
+    "NH": ("MA", "ME", "VT"),
+    "NJ": ("DE", "NY", "PA"),
+    "NM": ("AZ", "CO", "OK", "TX"),
+    "NV": ("AZ", "CA", "ID", "OR", "UT"),
+    "NY": ("CT", "MA", "NJ", "PA", "VT"),
+    "OH": ("IN", "KY", "MI", "PA", "WV"),
+    "OK": ("AR", "CO", "KS", "MO", "NM", "TX"),
+    "OR": ("CA", "ID", "NV", "WA"),
+    "PA": ("DE", "MD", "NJ", "NY", "OH", "WV"),
+    "RI": ("CT", "MA"),
+    "SC": ("GA", "NC"),
+    "SD": ("IA", "MN", "MT", "ND", "NE", "WY"),
+    "TN": ("AL", "AR", "GA", "KY", "MO", "MS", "NC", "VA"),
+    "TX": ("AR", "LA", "NM", "OK"),
+    "UT": ("AZ", "CO", "ID", "NV", "WY"),
+    "VA": ("DC", "KY", "MD", "NC", "TN", "WV"),
+    "VT": ("MA", "NH", "NY"),
+    "WA": ("ID", "OR"),
+    "WI": ("IA", "IL", "MI", "MN"),
+    "WV": ("KY", "MD", "OH", "PA", "VA"),
+    "WY": ("CO", "ID", "MT", "NE", "SD", "UT")
+}
+
+# Document statuses excluded when recency.active_only is set
+INACTIVE_STATUSES = frozenset({"superseded", "repealed", "overruled"})
+
+SECONDS_PER_YEAR = 365.25 * 86400
+
+
+class CascadeTier(NamedTuple):
+    """One search pass: tier name, jurisdiction filter and score weight"""
+    name: str
+    jurisdiction: Union[str, List[str], None]
+    weight: float
+
+
+@dataclass
+class JurisdictionCascade:
+    """
+    Tier order, weights and scoring preferences for cascaded retrieval
+
+    A hit is confident when its weighted score reaches ``min_confidence``;
+    a query stops cascading once it has ``min_confident_hits`` of them
+    (defaulting to the number of results the query asked for).
+    """
+    priority: Tuple[str, ...] = ("user_state", FEDERAL, "neighboring_states")
+    tier_weights: Dict[str, float] = field(default_factory=lambda: {
+        "user_state": 1.0,
+        FEDERAL: 0.9,
+        "neighboring_states": 0.75
+    })
+    min_confidence: float = 0.6
+    min_confident_hits: Optional[int] = None
+    prefer_recent: bool = True
+    cutoff_years: float = 10
+    active_only: bool = True
+    weight_by_court: bool = True
+    precedential_weight: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, filters: Optional[Dict[str, Any]]) -> "JurisdictionCascade":
+        """Build from the retrieval.filters section of rag_config.yaml"""
+        filters = filters or {}
+        jurisdiction = filters.get("jurisdiction", {})
+        recency = filters.get("recency", {})
+        authority = filters.get("authority", {})
+        defaults = cls()
+        priority = jurisdiction.get("priority")
+        return cls(
+            priority=tuple(
+                tier.strip() for tier in priority.split(">")
+            ) if priority else defaults.priority,
+            tier_weights=dict(defaults.tier_weights, **jurisdiction.get("tier_weights", {})),
+            min_confidence=jurisdiction.get("min_confidence", defaults.min_confidence),
+            min_confident_hits=jurisdiction.get("min_confident_hits"),
+            prefer_recent=recency.get("prefer_recent", defaults.prefer_recent),
+            cutoff_years=recency.get("cutoff_years", defaults.cutoff_years),
+            active_only=recency.get("active_only", defaults.active_only),
+            weight_by_court=authority.get("weight_by_court", defaults.weight_by_court),
+            precedential_weight=authority.get("precedential_weight", {})
+        )
+
+    def tiers(self, jurisdiction: Optional[str]) -> List[CascadeTier]:
+        """Search passes for a query, in priority order"""
+        if not jurisdiction:
+            return [CascadeTier("all", None, 1.0)]
+        if jurisdiction.lower() == FEDERAL:
+            return [CascadeTier(FEDERAL, FEDERAL, 1.0)]
+
+        state = jurisdiction.upper()
+        filters = {
+            "user_state": state,
+            FEDERAL: FEDERAL,
+            "neighboring_states": list(STATE_NEIGHBORS.get(state, ()))
+        }
+        return [
+            CascadeTier(name, filters[name], self.tier_weights.get(name, 1.0))
+            for name in self.priority
+            if filters.get(name)
+        ]
+
+    def rescore(
+        self,
+        matches: Iterable[Dict[str, Any]],
+        tier: CascadeTier,
+        now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Weight vector matches by tier, recency and authority; drop inactive law"""
+        now = now if now is not None else time.time()
+        rescored = []
+        for match in matches or []:
+            metadata = match.get("metadata") or {}
+            if self.active_only and metadata.get("status") in INACTIVE_STATUSES:
+                continue
+            vector_score = float(match.get("score", 0.0))
+            score = vector_score * tier.weight * self._recency(metadata, now) * self._authority(metadata)
+            rescored.append(dict(match, score=score, vector_score=vector_score, tier=tier.name))
+        return rescored
+
+    def merge(self, *hit_lists: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Union of hit lists, best score per id, best first"""
+        best: Dict[str, Dict[str, Any]] = {}
+        for hits in hit_lists:
+            for hit in hits:
+                current = best.get(hit["id"])
+                if current is None or hit["score"] > current["score"]:
+                    best[hit["id"]] = hit
+        return sorted(best.values(), key=lambda hit: hit["score"], reverse=True)
+
+    def satisfied(self, hits: List[Dict[str, Any]], max_results: int) -> bool:
+        """True once enough confident hits have been found to stop cascading"""
+        needed = self.min_confident_hits or max_results
+        return sum(1 for hit in hits if hit["score"] >= self.min_confidence) >= needed
+
+    def _recency(self, metadata: Dict[str, Any], now: float) -> float:
+        """1.0 for new law, falling to 0.8 at the cutoff and 0.5 past it"""
+        effective = metadata.get("date_effective")
+        if not self.prefer_recent or not effective or not self.cutoff_years:
+            return 1.0
+        age_years = max(now - float(effective), 0.0) / SECONDS_PER_YEAR
+        if age_years > self.cutoff_years:
+            return 0.5
+        return 1.0 - 0.2 * age_years / self.cutoff_years
+
+    def _authority(self, metadata: Dict[str, Any]) -> float:
+        """Scale by court level relative to the highest; unknown courts are neutral"""
+        weight = self.precedential_weight.get(metadata.get("court_level"))
+        if not self.weight_by_court or weight is None:
+            return 1.0
+        top = max(self.precedential_weight.values())
+        return 0.5 + 0.5 * weight / top if top > 0 else 1.0
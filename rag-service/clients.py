@@ -0,0 +1,502 @@
+"""
+Breakup-AI RAG Service
+Shared, pooled backend clients with per-backend backpressure
+
+Driver packages (asyncpg, neo4j, sentence-transformers) are imported and
+connected on first use so a worker can start serving without paying for
+them; the OpenAI and Anthropic APIs are called over the shared httpx pool.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from cache import TTLCache
+from config import load_rag_config
+from llm_gateway import LLMGateway
+
+
+class BackendOverloaded(Exception):
+    """Raised when a backend has no free slot within its queue limits"""
+
+    def __init__(self, backend: str):
+        super().__init__(f"{backend} is overloaded, try again shortly")
+        self.backend = backend
+
+
+class BackendLimiter:
+    """
+    Bounds in-flight calls to a single backend
+
+    At most ``max_concurrency`` calls run at once and at most ``max_queue``
+    callers wait for a slot. Callers beyond that, or callers that wait
+    longer than ``acquire_timeout`` seconds, get BackendOverloaded instead
+    of piling up behind a slow dependency.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        acquire_timeout: float
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, default_concurrency: int) -> "BackendLimiter":
+        """Build a limiter from ``<PREFIX>_MAX_CONCURRENCY`` style variables"""
+        return cls(
+            name,
+            max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", default_concurrency)),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", default_concurrency * 8)),
+            acquire_timeout=float(os.getenv(f"{prefix}_ACQUIRE_TIMEOUT", 5.0))
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self.max_concurrency - self._semaphore._value
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block"""
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            raise BackendOverloaded(self.name)
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise BackendOverloaded(self.name)
+        finally:
+            self._waiting -= 1
+
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+class PostgresClient:
+    """Metadata DB client backed by a shared asyncpg pool, opened on first use"""
+
+    def __init__(self, pool_kwargs: Dict[str, Any], limiter: BackendLimiter):
+        self.pool_kwargs = pool_kwargs
+        self.limiter = limiter
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    import asyncpg
+                    self._pool = await asyncpg.create_pool(**self.pool_kwargs)
+        return self._pool
+
+    async def fetch(self, sql: str, *args) -> List[Any]:
+        pool = await self.pool()
+        async with self.limiter.slot():
+            return await pool.fetch(sql, *args)
+
+    async def fetchrow(self, sql: str, *args) -> Optional[Any]:
+        pool = await self.pool()
+        async with self.limiter.slot():
+            return await pool.fetchrow(sql, *args)
+
+    async def execute(self, sql: str, *args) -> str:
+        pool = await self.pool()
+        async with self.limiter.slot():
+            return await pool.execute(sql, *args)
+
+    async def executemany(self, sql: str, args: List[tuple]) -> None:
+        pool = await self.pool()
+        async with self.limiter.slot():
+            await pool.executemany(sql, args)
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+
+
+class Neo4jClient:
+    """Graph DB client backed by a shared async Neo4j driver, created on first use"""
+
+    def __init__(self, uri: str, auth: tuple, database: str, limiter: BackendLimiter, pool_size: int = 20):
+        self.uri = uri
+        self.auth = auth
+        self.database = database
+        self.limiter = limiter
+        self.pool_size = pool_size
+        self._driver = None
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            from neo4j import AsyncGraphDatabase
+            self._driver = AsyncGraphDatabase.driver(
+                self.uri,
+                auth=self.auth,
+                max_connection_pool_size=self.pool_size
+            )
+        return self._driver
+
+    async def query(self, cypher: str, **params) -> List[Dict[str, Any]]:
+        async with self.limiter.slot():
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(cypher, **params)
+                return [record.data() async for record in result]
+
+    async def aclose(self) -> None:
+        if self._driver is not None:
+            await self._driver.close()
+
+
+class OpenAIEmbedder:
+    """Embedding model client over the shared httpx connection pool"""
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        api_key: str,
+        limiter: BackendLimiter,
+        model: str = "text-embedding-3-large",
+        dimensions: int = 3072
+    ):
+        self.http = http
+        self.api_key = api_key
+        self.limiter = limiter
+        self.model = model
+        self.dimensions = dimensions
+
+    async def embed(self, text: str) -> List[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        async with self.limiter.slot():
+            response = await self.http.post(
+                "https://api.openai.com/v1/embeddings",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={
+                    "model": self.model,
+                    "input": texts,
+                    "dimensions": self.dimensions
+                }
+            )
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+
+class OpenAIChatLLM:
+    """Chat completion client over the shared httpx connection pool"""
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        api_key: str,
+        limiter: BackendLimiter,
+        model: str = "gpt-4o",
+        temperature: float = 0.1,
+        max_tokens: int = 4000
+    ):
+        self.http = http
+        self.api_key = api_key
+        self.limiter = limiter
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    async def generate(self, prompt: str) -> str:
+        return await self._complete(prompt)
+
+    async def generate_json(self, prompt: str) -> Dict[str, Any]:
+        return json.loads(
+            await self._complete(prompt, response_format={"type": "json_object"})
+        )
+
+    async def _complete(self, prompt: str, **extra) -> str:
+        async with self.limiter.slot():
+            response = await self.http.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={
+                    "model": self.model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": self.temperature,
+                    "max_tokens": self.max_tokens,
+                    **extra
+                }
+            )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+
+class AnthropicChatLLM:
+    """Anthropic Messages API client over the shared httpx connection pool"""
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        api_key: str,
+        limiter: BackendLimiter,
+        model: str = "claude-3-5-sonnet-20241022",
+        temperature: float = 0.1,
+        max_tokens: int = 4000
+    ):
+        self.http = http
+        self.api_key = api_key
+        self.limiter = limiter
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    async def generate(self, prompt: str) -> str:
+        return await self._complete(prompt)
+
+    async def generate_json(self, prompt: str) -> Dict[str, Any]:
+        text = await self._complete(prompt)
+        # No JSON mode; take the outermost object from the reply
+        return json.loads(text[text.index("{"):text.rindex("}") + 1])
+
+    async def _complete(self, prompt: str) -> str:
+        async with self.limiter.slot():
+            response = await self.http.post(
+                "https://api.anthropic.com/v1/messages",
+                headers={
+                    "x-api-key": self.api_key,
+                    "anthropic-version": "2023-06-01"
+                },
+                json={
+                    "model": self.model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": self.temperature,
+                    "max_tokens": self.max_tokens
+                }
+            )
+        response.raise_for_status()
+        return "".join(
+            block["text"] for block in response.json()["content"] if block["type"] == "text"
+        )
+
+
+class PineconeVectorClient:
+    """Vector DB client using the Pinecone data-plane REST API"""
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        api_key: str,
+        index_host: str,
+        limiter: BackendLimiter
+    ):
+        self.http = http
+        self.api_key = api_key
+        self.index_host = index_host
+        self.limiter = limiter
+
+    async def search(
+        self,
+        embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        async with self.limiter.slot():
+            response = await self.http.post(
+                f"https://{self.index_host}/query",
+                headers={"Api-Key": self.api_key},
+                json={
+                    "vector": embedding.tolist() if hasattr(embedding, 'tolist') else embedding,
+                    "topK": top_k,
+                    "filter": self._to_pinecone_filter(filters or {}),
+                    "includeMetadata": True
+                }
+            )
+        response.raise_for_status()
+        return response.json().get("matches", [])
+
+    async def search_many(
+        self,
+        embeddings: List[List[float]],
+        filters: Optional[List[Optional[Dict[str, Any]]]] = None,
+        top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """Pinecone has no multi-query endpoint; issue the queries concurrently"""
+        filters = filters or [None] * len(embeddings)
+        return await asyncio.gather(*[
+            self.search(embedding, filters=query_filters, top_k=top_k)
+            for embedding, query_filters in zip(embeddings, filters)
+        ])
+
+    @staticmethod
+    def _to_pinecone_filter(filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Translate agent filters into Pinecone metadata filter syntax"""
+        pinecone_filter = {}
+        if 'jurisdiction' in filters:
+            jurisdiction = filters['jurisdiction']
+            pinecone_filter['jurisdiction'] = (
+                {'$in': list(jurisdiction)} if isinstance(jurisdiction, (list, tuple))
+                else {'$eq': jurisdiction}
+            )
+        if 'document_type' in filters:
+            pinecone_filter['document_type'] = {'$in': filters['document_type']}
+        if 'date_range' in filters:
+            start, end = filters['date_range']
+            pinecone_filter['date_effective'] = {
+                '$gte': start.timestamp(),
+                '$lte': end.timestamp()
+            }
+        return pinecone_filter
+
+
+@dataclass
+class BackendClients:
+    """Process-wide pooled clients, created once in the app lifespan"""
+    http: httpx.AsyncClient
+    metadata_db: PostgresClient
+    graph_db: Neo4jClient
+    vector_db: Any
+    embedder: OpenAIEmbedder
+    llm: LLMGateway
+
+    @classmethod
+    async def create(cls) -> "BackendClients":
+        """
+        Build all clients from environment configuration
+
+        No connections are opened here; pools connect on first use.
+        """
+        http = httpx.AsyncClient(
+            timeout=httpx.Timeout(float(os.getenv("HTTP_TIMEOUT", 30.0)), connect=5.0),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+            )
+        )
+
+        openai_key = os.getenv("OPENAI_API_KEY")
+        llm_config = load_rag_config().get("llm", {})
+
+        return cls(
+            http=http,
+            metadata_db=PostgresClient(
+                {
+                    "host": os.getenv("POSTGRES_HOST", "localhost"),
+                    "port": int(os.getenv("POSTGRES_PORT", 5432)),
+                    "database": os.getenv("POSTGRES_DB", "breakupai_legal"),
+                    "user": os.getenv("POSTGRES_USER", "postgres"),
+                    "password": os.getenv("POSTGRES_PASSWORD"),
+                    "min_size": int(os.getenv("POSTGRES_POOL_MIN", 2)),
+                    "max_size": int(os.getenv("POSTGRES_POOL_MAX", 10))
+                },
+                BackendLimiter.from_env(
+                    "postgres",
+                    "POSTGRES",
+                    int(os.getenv("POSTGRES_POOL_MAX", 10))
+                )
+            ),
+            graph_db=Neo4jClient(
+                os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+                (os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD")),
+                os.getenv("NEO4J_DATABASE", "breakupai"),
+                BackendLimiter.from_env("neo4j", "NEO4J", 20),
+                pool_size=int(os.getenv("NEO4J_POOL_MAX", 20))
+            ),
+            vector_db=PineconeVectorClient(
+                http,
+                os.getenv("PINECONE_API_KEY"),
+                os.getenv("PINECONE_INDEX_HOST"),
+                BackendLimiter.from_env("pinecone", "PINECONE", 32)
+            ),
+            embedder=OpenAIEmbedder(
+                http,
+                openai_key,
+                BackendLimiter.from_env("embedding", "EMBEDDING", 16)
+            ),
+            llm=cls._create_llm(http, openai_key, llm_config)
+        )
+
+    @staticmethod
+    def _create_llm(http: httpx.AsyncClient, openai_key: str, llm_config: Dict[str, Any]) -> LLMGateway:
+        """Primary/fallback chat models behind the coalescing, caching gateway"""
+        primary = llm_config.get("primary", {})
+        fallback = llm_config.get("fallback", {})
+        gateway = llm_config.get("gateway", {})
+        return LLMGateway(
+            primary=OpenAIChatLLM(
+                http,
+                openai_key,
+                BackendLimiter.from_env("llm", "LLM", 16),
+                model=primary.get("model", "gpt-4o"),
+                temperature=primary.get("temperature", 0.1),
+                max_tokens=primary.get("max_tokens", 4000)
+            ),
+            fallback=AnthropicChatLLM(
+                http,
+                os.getenv("ANTHROPIC_API_KEY"),
+                BackendLimiter.from_env("llm-fallback", "ANTHROPIC", 8),
+                model=fallback.get("model", "claude-3-5-sonnet-20241022"),
+                temperature=fallback.get("temperature", 0.1),
+                max_tokens=fallback.get("max_tokens", 4000)
+            ) if os.getenv("ANTHROPIC_API_KEY") else None,
+            cache=TTLCache.from_config(
+                gateway.get("cache"), max_entries=20000, ttl_seconds=86400
+            ),
+            timeout_seconds=gateway.get("timeout_seconds", 30),
+            failover_after_seconds=gateway.get("failover_after_seconds", 8)
+        )
+
+    async def aclose(self) -> None:
+        """Close all pools"""
+        await asyncio.gather(
+            self.http.aclose(),
+            self.metadata_db.aclose(),
+            self.graph_db.aclose(),
+            return_exceptions=True
+        )
+
+    def limiters(self) -> List[BackendLimiter]:
+        clients = [
+            self.metadata_db,
+            self.graph_db,
+            self.vector_db,
+            self.embedder,
+            self.llm.primary,
+            self.llm.fallback
+        ]
+        return [
+            client.limiter for client in clients
+            if getattr(client, 'limiter', None) is not None
+        ]
+
+
+class LazyCrossEncoder:
+    """sentence-transformers CrossEncoder, imported and loaded on first predict()"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def predict(self, pairs, **kwargs):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name)
+        return self._model.predict(pairs, **kwargs)
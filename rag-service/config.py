@@ -0,0 +1,27 @@
+"""
+Breakup-AI RAG Service
+Access to config/rag_config.yaml
+"""
+
+import os
+from functools import lru_cache
+from typing import Any, Dict
+
+import yaml
+
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "config",
+    "rag_config.yaml"
+)
+
+
+@lru_cache(maxsize=None)
+def load_rag_config(path: str = None) -> Dict[str, Any]:
+    """Parsed rag_config.yaml (RAG_CONFIG_PATH overrides the repo default)"""
+    path = path or os.getenv("RAG_CONFIG_PATH", DEFAULT_CONFIG_PATH)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
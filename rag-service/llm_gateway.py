@@ -0,0 +1,131 @@
+"""
+Breakup-AI RAG Service
+LLM gateway: single-flight coalescing, prompt cache and provider failover
+"""
+
+import asyncio
+import copy
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+class LLMGateway:
+    """
+    Drop-in llm_model that fronts a primary and a fallback chat client
+
+    - Identical prompts in flight at the same time share one provider call.
+    - Results are cached by (prompt hash, model) with TTL/LRU eviction;
+      the agent's prompts are deterministic (temperature 0.1).
+    - Each provider call is bounded by ``timeout_seconds``; concurrency is
+      bounded by the clients' own BackendLimiter.
+    - If the primary fails, or has not answered after
+      ``failover_after_seconds``, the fallback is raced against it and the
+      first successful answer wins.
+    """
+
+    def __init__(
+        self,
+        primary,
+        fallback=None,
+        cache: Optional[TTLCache] = None,
+        timeout_seconds: float = 30.0,
+        failover_after_seconds: float = 8.0
+    ):
+        self.primary = primary
+        self.fallback = fallback
+        self.cache = cache
+        self.timeout_seconds = timeout_seconds
+        self.failover_after_seconds = failover_after_seconds
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+        self.failovers = 0
+
+    @property
+    def model(self) -> str:
+        return self.primary.model
+
+    async def generate(self, prompt: str) -> str:
+        return await self._dispatch("generate", prompt)
+
+    async def generate_json(self, prompt: str) -> Dict[str, Any]:
+        return await self._dispatch("generate_json", prompt)
+
+    async def _dispatch(self, method: str, prompt: str) -> Any:
+        key = self._key(method, prompt)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return copy.deepcopy(cached)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._complete(method, prompt))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+
+        # A cancelled caller must not cancel the call other callers share;
+        # each caller gets its own copy of a shared (or cached) JSON result
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        if self.cache is not None and not task.cancelled() and task.exception() is None:
+            self.cache.set(key, task.result())
+
+    def _key(self, method: str, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{self.primary.model}:{method}:{digest}"
+
+    async def _complete(self, method: str, prompt: str) -> Any:
+        primary = asyncio.ensure_future(self._call(self.primary, method, prompt))
+        if self.fallback is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=self.failover_after_seconds)
+        if done and primary.exception() is None:
+            return primary.result()
+
+        self.failovers += 1
+        if done:
+            logger.warning("LLM primary %s failed, using fallback: %s", self.primary.model, primary.exception())
+            return await self._call(self.fallback, method, prompt)
+
+        logger.warning("LLM primary %s slow after %ss, racing fallback", self.primary.model, self.failover_after_seconds)
+        fallback = asyncio.ensure_future(self._call(self.fallback, method, prompt))
+        return await self._first_success([primary, fallback])
+
+    async def _call(self, client, method: str, prompt: str) -> Any:
+        return await asyncio.wait_for(getattr(client, method)(prompt), self.timeout_seconds)
+
+    @staticmethod
+    async def _first_success(tasks: List[asyncio.Future]) -> Any:
+        """Result of the first task to succeed; re-raise the last error if all fail"""
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "coalesced": self.coalesced,
+            "failovers": self.failovers,
+            "cache": self.cache.stats() if self.cache is not None else None
+        }
@@ -3,24 +3,123 @@ Breakup-AI RAG Service
 FastAPI service for legal knowledge retrieval
 """
 
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
 from dotenv import load_dotenv
 
 # Import RAG agent
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from rag_agent import LegalRAGAgent, DocumentType, Jurisdiction, JurisdictionLevel
+from rag_agent import LegalRAGAgent, DocumentType, Jurisdiction, JurisdictionLevel, QuerySpec
+from agent_factory import create_rag_agent, load_index_snapshots
+from clients import BackendClients, BackendOverloaded
+from batching import MicroBatcher
+from bundles import BundleStore
+from cache import AgentCaches
+from config import load_rag_config
+from prewarm import PrewarmLoader
+from query_log import QueryLogger
 
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create pooled backend clients and the RAG agent once per worker
+    """
+    app.state.rag_agent = None
+    app.state.clients = None
+    app.state.query_batcher = None
+    app.state.bundles = None
+    app.state.caches = None
+    app.state.index_snapshots = None
+    app.state.query_log = None
+    background_tasks = []
+    executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("RAG_THREAD_POOL_SIZE", 32)),
+        thread_name_prefix="rag-agent"
+    )
+
+    # Mock responses are served until backends are configured
+    if os.getenv("RAG_BACKENDS_ENABLED", "false").lower() == "true":
+        clients = await BackendClients.create()
+        app.state.clients = clients
+
+        # Local snapshots replace Pinecone once a version is published
+        app.state.index_snapshots = load_index_snapshots(fallback=clients.vector_db)
+        if app.state.index_snapshots is not None:
+            clients.vector_db = app.state.index_snapshots
+            background_tasks.append(asyncio.create_task(
+                app.state.index_snapshots.watch(
+                    load_rag_config().get("vector_database", {}).get("index_snapshots", {}).get("refresh_seconds", 60)
+                )
+            ))
+
+        app.state.query_log = QueryLogger.from_config(
+            clients.metadata_db,
+            load_rag_config().get("metadata_database", {}).get("query_log"),
+            mode=load_rag_config().get("security", {}).get("privacy", {}).get("query_logging", "anonymous")
+        )
+        app.state.query_log.start()
+
+        bundle_config = load_rag_config().get("ingestion", {}).get("bundles", {})
+        bundle_path = os.getenv("BUNDLES_PATH", bundle_config.get("path"))
+        if bundle_path:
+            app.state.bundles = BundleStore(bundle_path)
+            background_tasks.append(asyncio.create_task(
+                app.state.bundles.watch(bundle_config.get("refresh_seconds", 30))
+            ))
+
+        caching_config = load_rag_config().get("caching", {})
+        app.state.caches = AgentCaches.from_config(caching_config)
+        prewarm_config = caching_config.get("prewarm", {})
+        if prewarm_config.get("enabled") and prewarm_config.get("path"):
+            prewarm = PrewarmLoader(prewarm_config["path"], app.state.caches)
+            # Loads in the background; requests served meanwhile just miss the cache
+            background_tasks.append(asyncio.create_task(
+                prewarm.watch(prewarm_config.get("refresh_seconds", 300))
+            ))
+
+        app.state.rag_agent = create_rag_agent(
+            clients,
+            executor=executor,
+            bundles=app.state.bundles,
+            caches=app.state.caches
+        )
+        # Coalesce concurrent /query requests into shared embed/search/rerank calls
+        app.state.query_batcher = MicroBatcher(
+            app.state.rag_agent.aquery_many,
+            max_batch_size=int(os.getenv("QUERY_BATCH_MAX_SIZE", 32)),
+            max_wait_ms=float(os.getenv("QUERY_BATCH_MAX_WAIT_MS", 5))
+        )
+
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        if app.state.query_batcher is not None:
+            await app.state.query_batcher.aclose()
+        if app.state.query_log is not None:
+            await app.state.query_log.aclose()
+        if app.state.clients is not None:
+            await app.state.clients.aclose()
+        executor.shutdown(wait=False)
+
+
 app = FastAPI(
     title="Breakup-AI RAG Service",
     description="Legal knowledge retrieval and analysis API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -32,8 +131,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize RAG agent (placeholder - needs actual DB connections)
-rag_agent = None  # Initialize with actual connections
+
+@app.exception_handler(BackendOverloaded)
+async def backend_overloaded_handler(request: Request, exc: BackendOverloaded):
+    """Shed load with 503 instead of queueing behind a saturated backend"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "backend": exc.backend},
+        headers={"Retry-After": "1"}
+    )
+
+
+def get_rag_agent(request: Request) -> Optional[LegalRAGAgent]:
+    """RAG agent for this worker, or None while serving mock responses"""
+    return request.app.state.rag_agent
+
+
+def record_query(
+    request: Request,
+    user_id: Optional[str],
+    query: str,
+    response,
+    jurisdiction: Optional[str],
+    query_type: str
+) -> None:
+    """Hand an answered query to the write-behind query_history logger"""
+    query_log = request.app.state.query_log
+    if query_log is not None:
+        query_log.log(user_id, query, response, jurisdiction, query_type)
 
 # Request/Response Models
 class QueryRequest(BaseModel):
@@ -42,6 +167,9 @@ class QueryRequest(BaseModel):
     documentTypes: Optional[List[str]] = None
     maxResults: int = Field(5, ge=1, le=20)
 
+class QueryBatchRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., min_length=1, max_length=100)
+
 class DefinitionRequest(BaseModel):
     term: str
     jurisdiction: Optional[str] = None
@@ -61,70 +189,155 @@ class ProcedureRequest(BaseModel):
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint"""
+    clients = request.app.state.clients
     return {
         "status": "healthy",
         "service": "rag-service",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "backends": {
+            limiter.name: {
+                "in_flight": limiter.in_flight,
+                "waiting": limiter.waiting
+            }
+            for limiter in clients.limiters()
+        } if clients is not None else {},
+        "bundles_version": request.app.state.bundles.version
+        if request.app.state.bundles is not None else None,
+        "index_snapshot_version": request.app.state.index_snapshots.version
+        if request.app.state.index_snapshots is not None else None,
+        "caches": request.app.state.caches.stats()
+        if request.app.state.caches is not None else {},
+        "llm_gateway": clients.llm.stats() if clients is not None else {},
+        "query_log": request.app.state.query_log.stats()
+        if request.app.state.query_log is not None else {}
     }
 
 
 @app.post("/query")
 async def query_legal(
     request: QueryRequest,
+    http_request: Request,
     x_user_id: Optional[str] = Header(None)
 ):
     """
     Query the legal RAG system
     """
     try:
-        # Mock response for now
-        # TODO: Implement actual RAG query
-        return {
-            "query": request.question,
-            "intent": {
-                "type": "general_query",
-                "jurisdiction": request.jurisdiction or "federal",
-                "concepts": []
-            },
-            "results": [
-                {
-                    "document_id": "mock_doc_1",
-                    "relevance_score": 0.95,
-                    "document_type": "statute",
-                    "title": "Sample Legal Reference",
-                    "excerpt": "This is a mock response. Connect to actual RAG system.",
-                    "plain_language": "This explains the concept in simple terms.",
-                    "citation": "Mock Citation § 1234",
-                    "jurisdiction": request.jurisdiction or "federal",
-                    "date_effective": "2024-01-01"
-                }
-            ],
-            "related_definitions": [],
-            "cross_references": [],
-            "procedural_next_steps": [
-                "Review the legal reference",
-                "Consult with a qualified attorney",
-                "Gather necessary documentation"
-            ],
-            "confidence_score": 0.85,
-            "sources_count": 1
-        }
+        batcher = http_request.app.state.query_batcher
+        if batcher is not None:
+            response = await batcher.submit(to_query_spec(request))
+            record_query(
+                http_request, x_user_id, request.question, response,
+                request.jurisdiction, "legal_query"
+            )
+            return response
+
+        return mock_query_response(request)
+    except BackendOverloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/query/batch")
+async def query_legal_batch(
+    request: QueryBatchRequest,
+    rag_agent: Optional[LegalRAGAgent] = Depends(get_rag_agent)
+):
+    """
+    Answer many queries in one call (offline evaluation runs)
+    """
+    try:
+        if rag_agent is not None:
+            responses = await rag_agent.aquery_many(
+                [to_query_spec(query) for query in request.queries]
+            )
+            failures = [r for r in responses if isinstance(r, Exception)]
+            if failures and len(failures) == len(responses):
+                raise failures[0]
+            # Partial failures are reported per query
+            responses = [
+                {"error": str(r)} if isinstance(r, Exception) else r
+                for r in responses
+            ]
+        else:
+            responses = [mock_query_response(query) for query in request.queries]
+        return {"responses": responses, "count": len(responses)}
+    except BackendOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def to_query_spec(request: QueryRequest) -> QuerySpec:
+    """Convert an API query into the agent's batched query spec"""
+    return QuerySpec(
+        question=request.question,
+        jurisdiction=request.jurisdiction,
+        document_types=[DocumentType(t) for t in request.documentTypes]
+        if request.documentTypes else None,
+        max_results=request.maxResults
+    )
+
+
+def mock_query_response(request: QueryRequest) -> dict:
+    """Mock query response served until backends are configured"""
+    return {
+        "query": request.question,
+        "intent": {
+            "type": "general_query",
+            "jurisdiction": request.jurisdiction or "federal",
+            "concepts": []
+        },
+        "results": [
+            {
+                "document_id": "mock_doc_1",
+                "relevance_score": 0.95,
+                "document_type": "statute",
+                "title": "Sample Legal Reference",
+                "excerpt": "This is a mock response. Connect to actual RAG system.",
+                "plain_language": "This explains the concept in simple terms.",
+                "citation": "Mock Citation § 1234",
+                "jurisdiction": request.jurisdiction or "federal",
+                "date_effective": "2024-01-01"
+            }
+        ],
+        "related_definitions": [],
+        "cross_references": [],
+        "procedural_next_steps": [
+            "Review the legal reference",
+            "Consult with a qualified attorney",
+            "Gather necessary documentation"
+        ],
+        "confidence_score": 0.85,
+        "sources_count": 1
+    }
+
+
 @app.get("/definition/{term}")
 async def get_definition(
     term: str,
+    http_request: Request,
     jurisdiction: Optional[str] = None,
-    plainLanguage: bool = True
+    plainLanguage: bool = True,
+    x_user_id: Optional[str] = Header(None),
+    rag_agent: Optional[LegalRAGAgent] = Depends(get_rag_agent)
 ):
     """
     Get legal definition
     """
     try:
+        if rag_agent is not None:
+            response = await rag_agent.aget_definition(
+                term,
+                jurisdiction=jurisdiction,
+                plain_language=plainLanguage
+            )
+            record_query(http_request, x_user_id, term, response, jurisdiction, "definition")
+            return response
+
         # Mock response
         return {
             "term": term,
@@ -136,16 +349,31 @@ async def get_definition(
             "related_terms": [],
             "examples": []
         }
+    except BackendOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/compare-states")
-async def compare_states(request: StateComparisonRequest):
+async def compare_states(
+    request: StateComparisonRequest,
+    http_request: Request,
+    x_user_id: Optional[str] = Header(None),
+    rag_agent: Optional[LegalRAGAgent] = Depends(get_rag_agent)
+):
     """
     Compare legal concepts across states
     """
     try:
+        if rag_agent is not None:
+            response = await rag_agent.acompare_states(request.concept, request.states)
+            record_query(
+                http_request, x_user_id, request.concept, response,
+                ",".join(request.states), "compare_states"
+            )
+            return response
+
         # Mock response
         return {
             "concept": request.concept,
@@ -164,6 +392,8 @@ async def compare_states(request: StateComparisonRequest):
             ],
             "recommendations": []
         }
+    except BackendOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -171,12 +401,20 @@ async def compare_states(request: StateComparisonRequest):
 @app.get("/procedure/{procedure_type}")
 async def get_procedure(
     procedure_type: str,
-    jurisdiction: str
+    jurisdiction: str,
+    http_request: Request,
+    x_user_id: Optional[str] = Header(None),
+    rag_agent: Optional[LegalRAGAgent] = Depends(get_rag_agent)
 ):
     """
     Get procedure guide
     """
     try:
+        if rag_agent is not None:
+            response = await rag_agent.aget_procedure(procedure_type, jurisdiction)
+            record_query(http_request, x_user_id, procedure_type, response, jurisdiction, "procedure")
+            return response
+
         # Mock response
         return {
             "procedure_type": procedure_type,
@@ -196,16 +434,34 @@ async def get_procedure(
             "cost_estimate": None,
             "governing_statutes": []
         }
+    except BackendOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/evidence")
-async def get_evidence_requirements(request: EvidenceRequest):
+async def get_evidence_requirements(
+    request: EvidenceRequest,
+    http_request: Request,
+    x_user_id: Optional[str] = Header(None),
+    rag_agent: Optional[LegalRAGAgent] = Depends(get_rag_agent)
+):
     """
     Get evidence requirements for claim type
     """
     try:
+        if rag_agent is not None:
+            response = await rag_agent.aget_evidence_requirements(
+                request.claimType,
+                request.jurisdiction
+            )
+            record_query(
+                http_request, x_user_id, request.claimType, response,
+                request.jurisdiction, "evidence"
+            )
+            return response
+
         # Mock response
         return {
             "claim_type": request.claimType,
@@ -226,6 +482,8 @@ async def get_evidence_requirements(request: EvidenceRequest):
             ],
             "examples": []
         }
+    except BackendOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,22 @@
+-- PostgreSQL schema for the RAG service's metadata database (breakupai_legal)
+-- Applied by docker-compose on first start (docker-entrypoint-initdb.d), or:
+--   psql "$DATABASE_URL" -f rag-service/migrations/001_query_history.sql
+--
+-- Written by rag-service/query_log.py. This is not the Cloudflare D1 table in
+-- migrations/001_initial_schema.sql: user profiles live in D1, so user_id has
+-- no foreign key here, and privacy.query_logging: anonymous stores every row
+-- as 'anonymous'.
+
+CREATE TABLE IF NOT EXISTS query_history (
+  id BIGSERIAL PRIMARY KEY,
+  user_id TEXT NOT NULL DEFAULT 'anonymous',
+  query TEXT NOT NULL,
+  response TEXT, -- JSON, or 'zlib:' + base64 when compressed
+  jurisdiction TEXT,
+  query_type TEXT, -- 'legal_query', 'definition', 'compare_states', etc.
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_query_history_user ON query_history(user_id);
+-- Time-windowed scans by the prewarm job (rag-service/prewarm.py)
+CREATE INDEX IF NOT EXISTS idx_query_history_created ON query_history(created_at, query_type);
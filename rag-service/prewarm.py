@@ -0,0 +1,185 @@
+"""
+Breakup-AI RAG Service
+Cache prewarming from query_history
+
+A scheduled job mines the most frequent queries per (jurisdiction,
+query_type) over a sliding window, runs them through the agent and saves
+the resulting embeddings, retrieval results and plain-language text to a
+snapshot. Workers load the snapshot into their caches at startup and
+whenever it is replaced, so the common questions are warm after a deploy
+without every worker paying for the LLM calls.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cache import AgentCaches
+from rag_agent import LegalRAGAgent, QuerySpec
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+TOP_QUERIES_SQL = """
+    SELECT query, jurisdiction, query_type, hits
+    FROM (
+        SELECT
+            MIN(query) AS query,
+            jurisdiction,
+            query_type,
+            COUNT(*) AS hits,
+            ROW_NUMBER() OVER (
+                PARTITION BY jurisdiction, query_type
+                ORDER BY COUNT(*) DESC
+            ) AS rank
+        FROM query_history
+        WHERE created_at >= NOW() - make_interval(days => $1)
+          AND query_type = ANY($3::text[])
+        GROUP BY LOWER(BTRIM(query)), jurisdiction, query_type
+    ) ranked
+    WHERE rank <= $2
+    ORDER BY hits DESC
+"""
+
+# query_history.query_type values the prewarm job knows how to replay
+PREWARMED_QUERY_TYPES = ("legal_query", "definition")
+
+
+async def mine_top_queries(
+    metadata_db,
+    window_days: int,
+    top_n: int
+) -> List[Dict[str, Any]]:
+    """Top-N queries per (jurisdiction, query_type) over the last window_days"""
+    rows = await metadata_db.fetch(
+        TOP_QUERIES_SQL,
+        window_days,
+        top_n,
+        list(PREWARMED_QUERY_TYPES)
+    )
+    return [dict(row) for row in rows]
+
+
+async def run_prewarm(
+    agent: LegalRAGAgent,
+    rows: List[Dict[str, Any]],
+    batch_size: int = 32
+) -> Dict[str, int]:
+    """Replay mined queries through the agent so its caches fill up"""
+    specs = [
+        QuerySpec(question=row["query"], jurisdiction=row["jurisdiction"])
+        for row in rows
+        if row["query_type"] == "legal_query"
+    ]
+    terms = [
+        (row["query"], row["jurisdiction"])
+        for row in rows
+        if row["query_type"] == "definition"
+    ]
+
+    translated = 0
+    for start in range(0, len(specs), batch_size):
+        translated += await agent.aprewarm(specs[start:start + batch_size])
+
+    definitions = await asyncio.gather(*[
+        agent.aget_definition(term, jurisdiction=jurisdiction)
+        for term, jurisdiction in terms
+    ], return_exceptions=True)
+
+    return {
+        "queries": len(specs),
+        "plain_language": translated,
+        "definitions": sum(1 for d in definitions if not isinstance(d, Exception))
+    }
+
+
+def write_snapshot(path: str, caches: AgentCaches) -> None:
+    """Atomically save cache contents (embeddings as float32, the rest as JSON)"""
+    embedding_items = list(caches.embeddings.items())
+    dims = len(embedding_items[0][1]) if embedding_items else 0
+    payload = {
+        "format": SNAPSHOT_FORMAT,
+        "built_at": datetime.utcnow().isoformat(),
+        "retrieval": dict(caches.retrieval.items()),
+        "plain_language": dict(caches.plain_language.items())
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp_path,
+        embedding_keys=np.asarray([key for key, _ in embedding_items], dtype=str),
+        embeddings=np.asarray(
+            [embedding for _, embedding in embedding_items],
+            dtype=np.float32
+        ).reshape(len(embedding_items), dims),
+        payload=np.asarray(json.dumps(payload, default=str))
+    )
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str, caches: AgentCaches) -> Dict[str, int]:
+    """Load a prewarm snapshot into the caches"""
+    with np.load(path, allow_pickle=False) as data:
+        payload = json.loads(str(data["payload"]))
+        if payload.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported prewarm snapshot format in {path}")
+        keys = data["embedding_keys"]
+        embeddings = data["embeddings"]
+
+    # Rows stay float32 arrays; the vector indexes and clients accept them as-is
+    for key, embedding in zip(keys, embeddings):
+        caches.embeddings.set(str(key), embedding)
+    for key, results in payload["retrieval"].items():
+        caches.retrieval.set(key, results)
+    for key, text in payload["plain_language"].items():
+        caches.plain_language.set(key, text)
+
+    return {
+        "embeddings": len(keys),
+        "retrieval": len(payload["retrieval"]),
+        "plain_language": len(payload["plain_language"])
+    }
+
+
+class PrewarmLoader:
+    """Loads the prewarm snapshot at startup and whenever it is replaced"""
+
+    def __init__(self, path: str, caches: AgentCaches):
+        self.path = path
+        self.caches = caches
+        self.loaded: Dict[str, int] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+
+    def refresh(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return False
+        if stamp == self._stamp:
+            return False
+        self.loaded = load_snapshot(self.path, self.caches)
+        self._stamp = stamp
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """
+        Load now, then poll for a new snapshot until cancelled
+
+        Loading runs in a worker thread so it never stalls the event loop;
+        a bad or half-pruned snapshot is logged and retried next poll.
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception("Prewarm snapshot load failed for %s", self.path)
+            await asyncio.sleep(interval)
@@ -0,0 +1,282 @@
+"""
+Breakup-AI RAG Service
+Write-behind query logging to query_history
+
+Handlers hand each answered query to QueryLogger.log(), which only
+appends to a bounded in-memory buffer. A background task serializes and
+compresses buffered rows off the event loop and writes them with one
+multi-row INSERT per batch, whenever the batch fills or the flush
+interval passes. When the buffer is full new rows are dropped and
+counted: logging never blocks or slows a request.
+
+The table is created by migrations/001_query_history.sql.
+"""
+
+import asyncio
+import base64
+import dataclasses
+import json
+import logging
+import re
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+
+logger = logging.getLogger(__name__)
+
+INSERT_SQL = """
+    INSERT INTO query_history (user_id, query, response, jurisdiction, query_type, created_at)
+    SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $6::timestamptz[])
+"""
+
+# Stored in place of user ids under privacy.query_logging: anonymous
+ANONYMOUS_USER = "anonymous"
+
+# Marks a zlib-compressed, base64-encoded response; plain JSON never starts with it
+COMPRESSED_PREFIX = "zlib:"
+
+# PII patterns scrubbed from query text and echoed fields before buffering
+_PII_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "[email]"),
+    (re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "[ssn]"),
+    (re.compile(r"(?:\+?1[\s.-]?)?\(?\b\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b"), "[phone]"),
+    (re.compile(r"\b\d{8,}\b"), "[number]")
+]
+
+# Response fields that echo the user's text, directly or via LLM output written from it
+_ECHO_FIELDS = frozenset({
+    "query",
+    "intent",
+    "term",
+    "concept",
+    "procedure_type",
+    "claim_type",
+    "procedural_next_steps",
+    "key_differences",
+    "recommendations"
+})
+
+
+class QueryLogEntry(NamedTuple):
+    user_id: str
+    query: str
+    response: Any
+    jurisdiction: Optional[str]
+    query_type: str
+    created_at: datetime
+
+
+def scrub_pii(text: str) -> str:
+    """Replace emails, SSNs, phone and account-like numbers with placeholders"""
+    for pattern, placeholder in _PII_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def scrub_value(value: Any) -> Any:
+    """scrub_pii() applied to every string inside nested dicts, lists and tuples"""
+    if isinstance(value, str):
+        return scrub_pii(value)
+    if isinstance(value, dict):
+        return {key: scrub_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [scrub_value(item) for item in value]
+    return value
+
+
+def encode_response(response: Any, compress_min_bytes: int) -> str:
+    """JSON text for the response column, compressed when large"""
+    text = json.dumps(response, default=_to_json, separators=(",", ":"))
+    if len(text) < compress_min_bytes:
+        return text
+    return COMPRESSED_PREFIX + base64.b64encode(zlib.compress(text.encode("utf-8"), 6)).decode("ascii")
+
+
+def decode_response(text: Optional[str]) -> Any:
+    """Inverse of encode_response() for readers of query_history.response"""
+    if text is None:
+        return None
+    if text.startswith(COMPRESSED_PREFIX):
+        text = zlib.decompress(base64.b64decode(text[len(COMPRESSED_PREFIX):])).decode("utf-8")
+    return json.loads(text)
+
+
+def _to_json(value: Any) -> Any:
+    """json.dumps fallback for agent result types"""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if dataclasses.is_dataclass(value):
+        # Shallow on purpose: asdict() would deep-copy corpus-backed documents
+        return {f.name: getattr(value, f.name) for f in dataclasses.fields(value)}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class QueryLogger:
+    """
+    Bounded write-behind buffer in front of query_history
+
+    Args:
+        metadata_db: Client with an async execute(sql, *args)
+        mode: privacy.query_logging setting; "anonymous" drops user ids
+            and scrubs PII from the query and the response fields that
+            echo it before buffering, "none" disables logging, anything
+            else stores rows as given
+        buffer_size: Rows held before new rows are shed
+        batch_size: Rows per INSERT; a full batch triggers a flush
+        flush_interval_ms: Longest a row waits before being written
+        compress_min_bytes: Responses at least this large are compressed
+    """
+
+    def __init__(
+        self,
+        metadata_db,
+        mode: str = "anonymous",
+        buffer_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval_ms: float = 1000.0,
+        compress_min_bytes: int = 4096
+    ):
+        self.metadata_db = metadata_db
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.compress_min_bytes = compress_min_bytes
+        self._buffer: Deque[QueryLogEntry] = deque()
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls, metadata_db, config: Optional[Dict[str, Any]], mode: str) -> "QueryLogger":
+        config = config or {}
+        return cls(
+            metadata_db,
+            mode=mode,
+            buffer_size=config.get("buffer_size", 10000),
+            batch_size=config.get("batch_size", 500),
+            flush_interval_ms=config.get("flush_interval_ms", 1000),
+            compress_min_bytes=config.get("compress_min_bytes", 4096)
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "none"
+
+    def log(
+        self,
+        user_id: Optional[str],
+        query: str,
+        response: Any,
+        jurisdiction: Optional[str],
+        query_type: str
+    ) -> bool:
+        """Buffer one query for writing; False when logging is off or the row was shed"""
+        if not self.enabled:
+            return False
+        if len(self._buffer) >= self.buffer_size:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Query log buffer full, %d rows dropped so far", self.dropped)
+            return False
+
+        if self.mode == "anonymous":
+            user_id = ANONYMOUS_USER
+            query = scrub_pii(query)
+            response = self._redact(response)
+        self._buffer.append(QueryLogEntry(
+            user_id or ANONYMOUS_USER,
+            query,
+            response,
+            jurisdiction,
+            query_type,
+            datetime.now(timezone.utc)
+        ))
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    def start(self) -> None:
+        if self._task is None and self.enabled:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """Stop the flush loop and write what is left in the buffer"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Query log flush timed out; %d rows lost", len(self._buffer))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write buffered rows in batches of batch_size"""
+        while self._buffer:
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(self.batch_size, len(self._buffer)))
+            ]
+            try:
+                columns = await asyncio.to_thread(self._columns, batch)
+                await self.metadata_db.execute(INSERT_SQL, *columns)
+                self.written += len(batch)
+            except Exception as e:
+                # Query history is best-effort; never retry into a struggling database
+                self.failed += len(batch)
+                logger.warning("Dropped %d query log rows: %s", len(batch), e)
+
+    def _columns(self, batch: List[QueryLogEntry]) -> List[List[Any]]:
+        """Column arrays for INSERT_SQL; response encoding runs here, off the loop"""
+        return [
+            [entry.user_id for entry in batch],
+            [entry.query for entry in batch],
+            [encode_response(entry.response, self.compress_min_bytes) for entry in batch],
+            [entry.jurisdiction for entry in batch],
+            [entry.query_type for entry in batch],
+            [entry.created_at for entry in batch]
+        ]
+
+    @staticmethod
+    def _redact(response: Any) -> Any:
+        """
+        Top-level copy of the response with echoed user text scrubbed
+
+        Only the small echo fields are rebuilt; results and other
+        corpus-backed fields are shared, so this stays cheap on the loop.
+        """
+        if dataclasses.is_dataclass(response) and not isinstance(response, type):
+            response = _to_json(response)
+        if not isinstance(response, dict):
+            return response
+        return {
+            key: scrub_value(value) if key in _ECHO_FIELDS else value
+            for key, value in response.items()
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
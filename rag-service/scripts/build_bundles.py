@@ -0,0 +1,93 @@
+"""
+Breakup-AI RAG Service
+Build or invalidate the per-state procedure/evidence bundle snapshot
+
+Run by the ingestion pipeline after forms or statute updates:
+
+    python scripts/build_bundles.py build
+    python scripts/build_bundles.py build --states CA NY
+    python scripts/build_bundles.py invalidate --update forms --states CA NY
+    python scripts/build_bundles.py invalidate --update statutes
+
+build --states rebuilds only those states and keeps the rest of the
+snapshot. Running workers pick up the new snapshot on their next refresh.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+
+from bundles import INVALIDATES, build_snapshot, invalidate_snapshot, merge_snapshot, write_snapshot
+from clients import BackendClients
+from config import load_rag_config
+from rag_agent import LegalRAGAgent
+
+
+def parse_args(bundle_config):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build", "invalidate"])
+    parser.add_argument("--path", default=os.getenv("BUNDLES_PATH", bundle_config.get("path")))
+    parser.add_argument("--update", choices=sorted(INVALIDATES), help="Ingestion update to invalidate for")
+    parser.add_argument("--states", nargs="*", help="Limit to these states (default: all)")
+    return parser.parse_args()
+
+
+async def build(path, bundle_config, states, partial):
+    clients = await BackendClients.create()
+    try:
+        # No bundles on this agent: every entry is compiled from live data
+        agent = LegalRAGAgent(
+            vector_db_client=clients.vector_db,
+            metadata_db_client=clients.metadata_db,
+            graph_db_client=clients.graph_db,
+            embedding_model=clients.embedder,
+            llm_model=clients.llm
+        )
+        snapshot = await build_snapshot(
+            agent,
+            bundle_config.get("procedure_types", []),
+            bundle_config.get("claim_types", []),
+            states
+        )
+    finally:
+        await clients.aclose()
+
+    failed = snapshot["failed"]
+    if partial:
+        snapshot = merge_snapshot(path, snapshot, states)
+    version = write_snapshot(path, snapshot)
+    print(f"Wrote {len(snapshot['procedures'])} procedure and "
+          f"{len(snapshot['evidence'])} evidence bundles to {path} (version {version})")
+    if failed:
+        print(f"Skipped {len(failed)} bundles that failed to compile: {', '.join(failed)}")
+
+
+def main():
+    load_dotenv()
+    config = load_rag_config()
+    bundle_config = config.get("ingestion", {}).get("bundles", {})
+    args = parse_args(bundle_config)
+
+    if args.command == "invalidate":
+        if not args.update:
+            sys.exit("invalidate requires --update")
+        version = invalidate_snapshot(args.path, args.update, args.states)
+        if version is None:
+            print(f"No bundle snapshot at {args.path}; nothing to invalidate")
+        else:
+            print(f"Invalidated {args.update} bundles in {args.path} (version {version})")
+        return
+
+    states = args.states
+    if not states:
+        state_sources = config.get("data_sources", {}).get("state", [])
+        states = next((source["states"] for source in state_sources if "states" in source), [])
+    asyncio.run(build(args.path, bundle_config, states, partial=bool(args.states)))
+
+
+if __name__ == "__main__":
+    main()
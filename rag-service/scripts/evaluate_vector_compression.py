@@ -0,0 +1,130 @@
+"""
+Breakup-AI RAG Service
+Recall@k and memory evaluation for compressed vector indexes
+
+Compares each configured compression mode against exact search over the
+same full-precision vectors and reports recall@k, per-query latency and
+search memory: the vector data scanned (mapped codes or vectors) plus the
+peak temporary allocations made while searching, as traced by tracemalloc.
+
+Usage:
+    python scripts/evaluate_vector_compression.py --index-dir /data/indexes/legal-cases
+    python scripts/evaluate_vector_compression.py --index-dir ... --mode pq --pq-subvectors 192
+    python scripts/evaluate_vector_compression.py --index-dir ... --queries queries.npy --k 10
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import load_rag_config
+from vector_index import DenseVectorIndex, QuantizedVectorIndex, build_codes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-dir", required=True, help="Index directory written by save_index()")
+    parser.add_argument("--queries", help=".npy of query embeddings (default: sample stored vectors)")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--mode", choices=["int8", "pq"], help="Evaluate one setting instead of the config")
+    parser.add_argument("--truncate-dims", type=int)
+    parser.add_argument("--pq-subvectors", type=int, default=96)
+    parser.add_argument("--rescore-candidates", type=int, default=100)
+    return parser.parse_args()
+
+
+def settings_to_evaluate(args):
+    """Explicit --mode, else the config entry for this index, else a default sweep"""
+    if args.mode:
+        return [{
+            "mode": args.mode,
+            "truncate_dims": args.truncate_dims,
+            "pq_subvectors": args.pq_subvectors,
+            "rescore_candidates": args.rescore_candidates
+        }]
+
+    name = os.path.basename(os.path.normpath(args.index_dir))
+    indexes = load_rag_config().get("vector_database", {}).get("pinecone", {}).get("indexes", [])
+    configured = [config.get("compression") for config in indexes if config["name"] == name]
+    if configured and configured[0] and configured[0].get("mode", "none") != "none":
+        return configured
+
+    return [
+        {"mode": "int8", "truncate_dims": None, "rescore_candidates": args.rescore_candidates},
+        {"mode": "int8", "truncate_dims": 1024, "rescore_candidates": args.rescore_candidates},
+        {"mode": "pq", "truncate_dims": None, "pq_subvectors": args.pq_subvectors,
+         "rescore_candidates": args.rescore_candidates}
+    ]
+
+
+def recall_at_k(exact, approx, k):
+    hits = [
+        len({hit["id"] for hit in e[:k]} & {hit["id"] for hit in a[:k]}) / max(min(k, len(e)), 1)
+        for e, a in zip(exact, approx)
+    ]
+    return float(np.mean(hits))
+
+
+def measured_search(index, queries, k):
+    """Results, ms per query and peak search memory (scanned data + temporaries)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = index.search_many(queries, top_k=k)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, elapsed_ms, index.nbytes + peak
+
+
+def report(label, recall, memory, exact_memory, ms):
+    print(f"{label:<36}{recall:>10.3f}{memory / 2**20:>10.1f}MB{exact_memory / memory:>7.1f}x{ms:>10.2f}")
+
+
+def main():
+    args = parse_args()
+    exact_index = DenseVectorIndex.load(args.index_dir)
+
+    if args.queries:
+        queries = np.load(args.queries)
+    else:
+        rng = np.random.default_rng(0)
+        rows = rng.choice(len(exact_index), min(args.num_queries, len(exact_index)), replace=False)
+        # Perturb stored vectors so queries are not exact duplicates
+        queries = exact_index.vectors[rows] + rng.normal(0, 0.01, (len(rows), exact_index.vectors.shape[1]))
+    queries = queries.astype(np.float32)
+
+    exact, exact_ms, exact_memory = measured_search(exact_index, queries, args.k)
+    print(f"{len(exact_index)} vectors, {len(queries)} queries, k={args.k}")
+    print(f"{'setting':<36}{'recall@k':>10}{'peak mem':>12}{'ratio':>8}{'ms/query':>10}")
+    report("exact float32", 1.0, exact_memory, exact_memory, exact_ms)
+
+    for compression in settings_to_evaluate(args):
+        quantizer, codes = build_codes(exact_index.vectors, compression)
+        index = QuantizedVectorIndex(
+            exact_index.ids,
+            exact_index.vectors,
+            exact_index.jurisdictions,
+            exact_index.document_types,
+            exact_index.date_effective,
+            codes=codes,
+            quantizer=quantizer,
+            truncate_dims=compression.get("truncate_dims"),
+            rescore_candidates=compression.get("rescore_candidates", 100)
+        )
+        approx, approx_ms, memory = measured_search(index, queries, args.k)
+
+        label = f"{compression['mode']} dims={compression.get('truncate_dims') or 'all'}"
+        if compression["mode"] == "pq":
+            label += f" m={compression.get('pq_subvectors', 96)}"
+        label += f" rescore={compression.get('rescore_candidates', 100)}"
+        report(label, recall_at_k(exact, approx, args.k), memory, exact_memory, approx_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Breakup-AI RAG Service
+Build the cache prewarm snapshot from query_history
+
+Mines the top queries per (jurisdiction, query_type) over the configured
+window, answers them once and writes the snapshot that workers load into
+their caches. Schedule it hourly and after deploys:
+
+    python scripts/prewarm_caches.py
+    python scripts/prewarm_caches.py --window-days 3 --top-n 100
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+
+from agent_factory import create_rag_agent, load_index_snapshots
+from cache import AgentCaches
+from clients import BackendClients
+from config import load_rag_config
+from prewarm import mine_top_queries, run_prewarm, write_snapshot
+
+
+def parse_args(prewarm_config):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=prewarm_config.get("path"))
+    parser.add_argument("--window-days", type=int, default=prewarm_config.get("window_days", 7))
+    parser.add_argument("--top-n", type=int, default=prewarm_config.get("top_n", 50))
+    return parser.parse_args()
+
+
+async def prewarm(args, caching_config):
+    # Same vector source, reranker and cascade as the workers, so cached
+    # results match what a worker would compute cold
+    clients = await BackendClients.create()
+    snapshots = load_index_snapshots(fallback=clients.vector_db)
+    if snapshots is not None:
+        clients.vector_db = snapshots
+    caches = AgentCaches.from_config(caching_config)
+    try:
+        agent = create_rag_agent(clients, caches=caches)
+        rows = await mine_top_queries(clients.metadata_db, args.window_days, args.top_n)
+        counts = await run_prewarm(agent, rows)
+    finally:
+        await clients.aclose()
+
+    write_snapshot(args.path, caches)
+    print(f"Prewarmed {counts['queries']} queries, {counts['definitions']} definitions and "
+          f"{counts['plain_language']} plain-language texts into {args.path}")
+
+
+def main():
+    load_dotenv()
+    caching_config = load_rag_config().get("caching", {})
+    args = parse_args(caching_config.get("prewarm", {}))
+    asyncio.run(prewarm(args, caching_config))
+
+
+if __name__ == "__main__":
+    main()
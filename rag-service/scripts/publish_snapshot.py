@@ -0,0 +1,69 @@
+"""
+Breakup-AI RAG Service
+Publish a new version of the mmapped local index snapshot
+
+Run by the ingestion pipeline once it has written fresh index outputs:
+
+    python scripts/publish_snapshot.py --vectors build/vectors --corpus build/corpus.bin
+    python scripts/publish_snapshot.py --vectors build/vectors --array keyword=build/keyword
+
+--vectors holds one save_index() directory per index name in rag_config.yaml;
+their text_spans point into the --corpus file, which supplies each hit's text.
+Compressed codes are built here, so workers only map files. Running workers
+swap to the new version on their next poll; no restart is needed.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import load_rag_config
+from snapshot import SnapshotManager, publish_snapshot
+
+
+def parse_args(snapshot_config):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=os.getenv("INDEX_SNAPSHOT_DIR", snapshot_config.get("path")))
+    parser.add_argument("--vectors", help="Directory of per-index vector directories")
+    parser.add_argument("--corpus", help="TextCorpus file with document text")
+    parser.add_argument("--array", action="append", default=[], metavar="NAME=DIR",
+                        help="Named directory of .npy files for another local index")
+    parser.add_argument("--keep-versions", type=int, default=snapshot_config.get("keep_versions", 3))
+    return parser.parse_args()
+
+
+def main():
+    vector_config = load_rag_config().get("vector_database", {})
+    args = parse_args(vector_config.get("index_snapshots", {}))
+    if not args.root:
+        sys.exit("No snapshot root: pass --root or set INDEX_SNAPSHOT_DIR")
+
+    arrays = {}
+    for entry in args.array:
+        name, _, directory = entry.partition("=")
+        if not directory:
+            sys.exit(f"--array expects NAME=DIR, got {entry!r}")
+        arrays[name] = directory
+
+    version = publish_snapshot(
+        args.root,
+        vectors_dir=args.vectors,
+        index_configs=vector_config.get("pinecone", {}).get("indexes", []),
+        corpus_path=args.corpus,
+        arrays=arrays,
+        keep_versions=args.keep_versions
+    )
+
+    # Time what a worker pays to open it
+    started = time.perf_counter()
+    snapshots = SnapshotManager(args.root)
+    snapshots.refresh()
+    print(f"Published {version} to {args.root} "
+          f"(opens in {(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
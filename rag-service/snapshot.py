@@ -0,0 +1,223 @@
+"""
+Breakup-AI RAG Service
+Versioned, memory-mapped snapshots of the agent's local indexes
+
+Layout under the snapshot root:
+
+    CURRENT                         name of the live version
+    versions/<version>/manifest.json
+    versions/<version>/vectors/<index-name>/...   see vector_index.py
+    versions/<version>/corpus.bin                 TextCorpus
+    versions/<version>/arrays/<name>/*.npy        other array-backed indexes
+
+Workers open a version read-only via mmap, so every worker (and container
+process) shares the same page-cache pages. Publishing writes a complete new
+version directory and then atomically replaces CURRENT; workers notice on
+their next poll and swap to it without a restart.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from rag_agent import TextCorpus
+from vector_index import VectorIndexSet, load_index
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+class IndexSnapshot:
+    """One opened snapshot version"""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported index snapshot format in {path}")
+
+        self.path = path
+        self.version: str = manifest["version"]
+        self.manifest = manifest
+
+        self.corpus = TextCorpus(os.path.join(path, "corpus.bin")) if manifest.get("corpus") else None
+        vector_indexes = manifest.get("vectors", {})
+        self.vectors = VectorIndexSet.load(
+            os.path.join(path, "vectors"),
+            [dict(entry, name=name) for name, entry in vector_indexes.items()],
+            corpus=self.corpus
+        ) if vector_indexes else None
+        self._arrays: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def arrays(self, name: str) -> Dict[str, np.ndarray]:
+        """Memory-mapped arrays of a named array-backed index"""
+        if name not in self._arrays:
+            directory = os.path.join(self.path, "arrays", name)
+            self._arrays[name] = {
+                filename[:-len(".npy")]: np.load(os.path.join(directory, filename), mmap_mode="r")
+                for filename in os.listdir(directory)
+                if filename.endswith(".npy")
+            }
+        return self._arrays[name]
+
+
+class SnapshotManager:
+    """
+    Holds the live IndexSnapshot and swaps it when CURRENT changes
+
+    Also serves as the agent's vector_db, delegating to the live snapshot,
+    so a swap takes effect for the next search. In-flight searches keep
+    their reference to the previous snapshot until they finish. Until a
+    version has opened, searches go to ``fallback`` (the Pinecone client)
+    when one is given.
+    """
+
+    def __init__(self, root: str, fallback=None):
+        self.root = root
+        self.fallback = fallback
+        self.current: Optional[IndexSnapshot] = None
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.current.version if self.current is not None else None
+
+    def refresh(self) -> bool:
+        """Open the version named in CURRENT if it changed; True when swapped"""
+        version = read_current(self.root)
+        if version is None or version == self.version:
+            return False
+        self.current = IndexSnapshot(os.path.join(self.root, "versions", version))
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """Poll CURRENT until cancelled; a version that fails to open leaves the live one serving"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception("Failed to open index snapshot under %s", self.root)
+
+    @property
+    def limiter(self):
+        return getattr(self.fallback, "limiter", None)
+
+    async def search(
+        self,
+        embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        return (await self.search_many([embedding], filters=[filters], top_k=top_k))[0]
+
+    async def search_many(
+        self,
+        embeddings: List[List[float]],
+        filters: Optional[List[Optional[Dict[str, Any]]]] = None,
+        top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        snapshot = self.current
+        if snapshot is None and self.fallback is not None:
+            return await self.fallback.search_many(embeddings, filters=filters, top_k=top_k)
+        if snapshot is None or snapshot.vectors is None:
+            return [[] for _ in embeddings]
+        # The scan is CPU-bound numpy work that releases the GIL
+        return await asyncio.to_thread(
+            snapshot.vectors.search_many, embeddings, filters=filters, top_k=top_k
+        )
+
+
+def read_current(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish_snapshot(
+    root: str,
+    vectors_dir: Optional[str] = None,
+    index_configs: Optional[List[Dict[str, Any]]] = None,
+    corpus_path: Optional[str] = None,
+    arrays: Optional[Dict[str, str]] = None,
+    keep_versions: int = 3
+) -> str:
+    """
+    Assemble a new version from staged build outputs and make it live
+
+    Args:
+        root: Snapshot root directory
+        vectors_dir: Directory of save_index() outputs, one per index name
+        index_configs: Index entries from rag_config.yaml (name, compression, document_types)
+        corpus_path: TextCorpus file
+        arrays: Named directories of .npy files for other local indexes
+        keep_versions: Old versions to keep for workers still draining
+
+    Returns:
+        The published version
+    """
+    version = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+    versions_dir = os.path.join(root, "versions")
+    staging = os.path.join(versions_dir, f".{version}.tmp")
+    os.makedirs(staging)
+
+    manifest: Dict[str, Any] = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(),
+        "vectors": {},
+        "corpus": False,
+        "arrays": sorted(arrays or {})
+    }
+
+    for config in index_configs or []:
+        source = os.path.join(vectors_dir or "", config["name"])
+        if not vectors_dir or not os.path.isdir(source):
+            continue
+        target = os.path.join(staging, "vectors", config["name"])
+        shutil.copytree(source, target)
+        # Build compressed codes now so workers never train on startup
+        load_index(target, config.get("compression"), build_missing=True)
+        manifest["vectors"][config["name"]] = {
+            "compression": config.get("compression"),
+            "document_types": config.get("document_types", [])
+        }
+
+    if corpus_path:
+        shutil.copy2(corpus_path, os.path.join(staging, "corpus.bin"))
+        manifest["corpus"] = True
+
+    for name, source in (arrays or {}).items():
+        shutil.copytree(source, os.path.join(staging, "arrays", name))
+
+    with open(os.path.join(staging, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(staging, os.path.join(versions_dir, version))
+
+    tmp_current = os.path.join(root, f"CURRENT.{os.getpid()}.tmp")
+    with open(tmp_current, "w") as f:
+        f.write(version)
+    os.replace(tmp_current, os.path.join(root, "CURRENT"))
+
+    _prune_versions(versions_dir, version, keep_versions)
+    return version
+
+
+def _prune_versions(versions_dir: str, current: str, keep_versions: int) -> None:
+    """Remove old versions; open mmaps keep unlinked files alive until unmapped"""
+    versions = sorted(
+        name for name in os.listdir(versions_dir)
+        if not name.startswith(".") and name != current
+    )
+    for name in versions[:max(len(versions) - keep_versions, 0)]:
+        shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
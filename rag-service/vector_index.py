@@ -0,0 +1,546 @@
+"""
+Breakup-AI RAG Service
+In-process vector indexes with batched search and compressed first-pass scans
+
+On-disk layout of an index directory:
+
+    ids.npy, jurisdictions.npy, document_types.npy, date_effective.npy
+    vectors.f32.npy                  L2-normalized full-precision vectors
+    text_spans.npy                   (offset, length) of each row's passage in
+                                     the snapshot's TextCorpus (optional)
+    codes-<mode>-<dims>.npy          compressed codes (int8 / pq)
+    quantizer-<mode>-<dims>.npz      quantizer parameters
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Float32 working set per scan block; codes are upcast one block at a time
+SCAN_BLOCK_BYTES = 8 * 2**20
+
+# Rows sampled to train quantizers
+TRAIN_SAMPLE_ROWS = 50000
+
+
+def _block_rows(width: int) -> int:
+    """Rows per block so a float32 block of ``width`` columns fits SCAN_BLOCK_BYTES"""
+    return max(256, SCAN_BLOCK_BYTES // (4 * max(width, 1)))
+
+
+class ScalarQuantizer:
+    """Symmetric per-dimension int8 quantization (4x smaller than float32)"""
+
+    mode = "int8"
+
+    def __init__(self, scale: np.ndarray):
+        self.scale = scale.astype(np.float32)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, **_) -> "ScalarQuantizer":
+        return cls(np.maximum(np.abs(vectors).max(axis=0), 1e-12) / 127.0)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def score(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Approximate inner products, shape (queries, rows)"""
+        scaled = (queries * self.scale).astype(np.float32)
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        block_rows = _block_rows(codes.shape[1])
+        block = np.empty((min(block_rows, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(codes), block_rows):
+            rows = codes[start:start + block_rows]
+            # Upcast into one reused buffer instead of a fresh temporary per block
+            np.copyto(block[:len(rows)], rows, casting='unsafe')
+            np.matmul(scaled, block[:len(rows)].T, out=scores[:, start:start + len(rows)])
+        return scores
+
+    def save(self, path: str) -> None:
+        np.savez(path, scale=self.scale)
+
+    @classmethod
+    def load(cls, path: str) -> "ScalarQuantizer":
+        return cls(np.load(path)['scale'])
+
+
+class ProductQuantizer:
+    """
+    Product quantization: one uint8 centroid id per sub-vector
+
+    With ``subvectors`` bytes per row instead of 4 bytes per dimension, a
+    3072-d vector split into 192 sub-vectors is 64x smaller.
+    """
+
+    mode = "pq"
+
+    def __init__(self, centroids: np.ndarray):
+        # (subvectors, centroids_per_subvector, sub_dim)
+        self.centroids = centroids.astype(np.float32)
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        subvectors: int = 96,
+        iterations: int = 15,
+        sample_size: int = 50000,
+        seed: int = 0,
+        **_
+    ) -> "ProductQuantizer":
+        dims = vectors.shape[1]
+        if dims % subvectors:
+            raise ValueError(f"{dims} dimensions are not divisible into {subvectors} sub-vectors")
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False)]
+        sub_dim = dims // subvectors
+        n_centroids = min(256, len(sample))
+
+        centroids = np.empty((subvectors, n_centroids, sub_dim), dtype=np.float32)
+        for m in range(subvectors):
+            block = np.ascontiguousarray(sample[:, m * sub_dim:(m + 1) * sub_dim], dtype=np.float32)
+            centroids[m] = cls._kmeans(block, n_centroids, iterations, rng)
+        return cls(centroids)
+
+    @staticmethod
+    def _kmeans(points: np.ndarray, k: int, iterations: int, rng) -> np.ndarray:
+        centers = points[rng.choice(len(points), k, replace=False)].copy()
+        for _ in range(iterations):
+            assign = ProductQuantizer._nearest(points, centers)
+            for c in range(k):
+                members = points[assign == c]
+                if len(members):
+                    centers[c] = members.mean(axis=0)
+        return centers
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        distances = (
+            (points ** 2).sum(axis=1, keepdims=True)
+            - 2 * points @ centers.T
+            + (centers ** 2).sum(axis=1)
+        )
+        return distances.argmin(axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        subvectors, _, sub_dim = self.centroids.shape
+        codes = np.empty((len(vectors), subvectors), dtype=np.uint8)
+        for m in range(subvectors):
+            block = np.asarray(vectors[:, m * sub_dim:(m + 1) * sub_dim], dtype=np.float32)
+            codes[:, m] = self._nearest(block, self.centroids[m])
+        return codes
+
+    def score(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Asymmetric distance computation via per-query lookup tables"""
+        subvectors, _, sub_dim = self.centroids.shape
+        # (queries, subvectors, centroids)
+        tables = np.einsum(
+            'qmd,mcd->qmc',
+            queries.reshape(len(queries), subvectors, sub_dim),
+            self.centroids
+        )
+        scores = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        # Each lookup gathers a (queries, block) float32 temporary
+        block_rows = _block_rows(len(queries))
+        for start in range(0, len(codes), block_rows):
+            block = np.asarray(codes[start:start + block_rows])
+            for m in range(subvectors):
+                scores[:, start:start + len(block)] += tables[:, m, block[:, m]]
+        return scores
+
+    def save(self, path: str) -> None:
+        np.savez(path, centroids=self.centroids)
+
+    @classmethod
+    def load(cls, path: str) -> "ProductQuantizer":
+        return cls(np.load(path)['centroids'])
+
+
+QUANTIZERS = {
+    ScalarQuantizer.mode: ScalarQuantizer,
+    ProductQuantizer.mode: ProductQuantizer
+}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+class DenseVectorIndex:
+    """
+    Exact cosine-similarity index
+
+    Vectors are stored L2-normalized so a batch of queries is scored with a
+    single matrix multiply. Jurisdiction, document type and effective date
+    are kept as column arrays so filters become boolean masks. When the
+    index has text spans and a ``corpus`` is attached, each hit carries its
+    passage as ``metadata['text']``, read from the mapped corpus.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        jurisdictions: np.ndarray,
+        document_types: np.ndarray,
+        date_effective: np.ndarray,
+        text_spans: Optional[np.ndarray] = None
+    ):
+        self.ids = ids
+        self.vectors = vectors
+        self.jurisdictions = jurisdictions
+        self.document_types = document_types
+        self.date_effective = date_effective
+        self.text_spans = text_spans
+        self.corpus = None
+
+    @classmethod
+    def load(cls, path: str) -> "DenseVectorIndex":
+        """
+        Open an index directory written by save_index()
+
+        Every array is memory-mapped read-only, so workers opening the same
+        files share their pages instead of each holding a copy.
+        """
+        return cls(
+            ids=_open_array(path, 'ids.npy'),
+            vectors=_open_array(path, 'vectors.f32.npy'),
+            jurisdictions=_open_array(path, 'jurisdictions.npy'),
+            document_types=_open_array(path, 'document_types.npy'),
+            date_effective=_open_array(path, 'date_effective.npy'),
+            text_spans=_open_array(path, 'text_spans.npy')
+            if os.path.exists(os.path.join(path, 'text_spans.npy')) else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory for vector data"""
+        return self.vectors.nbytes
+
+    def search(
+        self,
+        embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        return self.search_many([embedding], filters=[filters], top_k=top_k)[0]
+
+    def search_many(
+        self,
+        embeddings: List[List[float]],
+        filters: Optional[List[Optional[Dict[str, Any]]]] = None,
+        top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """Score all queries against the index in one matrix multiply"""
+        queries = _normalize(embeddings)
+        scores = queries @ self.vectors.T
+
+        filters = filters or [None] * len(queries)
+        return [
+            [self._match(row, score) for row, score in self._top_k(row_scores, self._mask(query_filters), top_k)]
+            for row_scores, query_filters in zip(scores, filters)
+        ]
+
+    def _mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean row mask for agent-style metadata filters"""
+        if not filters:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        if 'jurisdiction' in filters:
+            jurisdiction = filters['jurisdiction']
+            if isinstance(jurisdiction, (list, tuple)):
+                mask &= np.isin(self.jurisdictions, jurisdiction)
+            else:
+                mask &= self.jurisdictions == jurisdiction
+        if 'document_type' in filters:
+            mask &= np.isin(self.document_types, filters['document_type'])
+        if 'date_range' in filters:
+            start, end = filters['date_range']
+            mask &= (self.date_effective >= start.timestamp()) & (self.date_effective <= end.timestamp())
+        return mask
+
+    def _top_k(self, scores: np.ndarray, mask: Optional[np.ndarray], top_k: int):
+        """(row, score) pairs for the best unmasked rows, best first"""
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [(row, scores[row]) for row in ranked if np.isfinite(scores[row])]
+
+    def _match(self, row: int, score: float) -> Dict[str, Any]:
+        metadata = {
+            'jurisdiction': str(self.jurisdictions[row]),
+            'document_type': str(self.document_types[row]),
+            'date_effective': float(self.date_effective[row])
+        }
+        if self.corpus is not None and self.text_spans is not None:
+            offset, length = self.text_spans[row]
+            metadata['text'] = self.corpus.read(int(offset), int(length))
+        return {
+            'id': str(self.ids[row]),
+            'score': float(score),
+            'metadata': metadata
+        }
+
+
+class QuantizedVectorIndex(DenseVectorIndex):
+    """
+    Two-stage index: compressed first-pass scan, full-precision rescoring
+
+    Only the compressed codes are held in memory. The first pass scores
+    every row from codes (optionally over the leading ``truncate_dims``
+    dimensions only), keeps ``rescore_candidates`` per query and rescores
+    those against full-precision vectors read from the memory-mapped
+    vectors file.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        jurisdictions: np.ndarray,
+        document_types: np.ndarray,
+        date_effective: np.ndarray,
+        codes: np.ndarray,
+        quantizer,
+        truncate_dims: Optional[int] = None,
+        rescore_candidates: int = 100,
+        text_spans: Optional[np.ndarray] = None
+    ):
+        super().__init__(ids, vectors, jurisdictions, document_types, date_effective, text_spans)
+        self.codes = codes
+        self.quantizer = quantizer
+        self.truncate_dims = truncate_dims
+        self.rescore_candidates = rescore_candidates
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        compression: Dict[str, Any],
+        build_missing: bool = False
+    ) -> "QuantizedVectorIndex":
+        """
+        Load codes for this compression setting
+
+        Training a quantizer takes tens of seconds on a full index, so
+        missing codes raise FileNotFoundError unless ``build_missing`` is
+        set (publish_snapshot builds them before workers see the version).
+        """
+        dense = DenseVectorIndex.load(path)
+        mode = compression['mode']
+        truncate_dims = compression.get('truncate_dims')
+        suffix = f"{mode}-{truncate_dims or dense.vectors.shape[1]}"
+        if mode == ProductQuantizer.mode:
+            suffix += f"-{compression.get('pq_subvectors', 96)}"
+        codes_path = os.path.join(path, f"codes-{suffix}.npy")
+        quantizer_path = os.path.join(path, f"quantizer-{suffix}.npz")
+
+        if not (os.path.exists(codes_path) and os.path.exists(quantizer_path)):
+            if not build_missing:
+                raise FileNotFoundError(f"No {suffix} codes under {path}; publish the snapshot to build them")
+            quantizer, codes = build_codes(dense.vectors, compression)
+            _atomic_save(quantizer_path, quantizer.save)
+            _atomic_save(codes_path, lambda tmp: np.save(tmp, codes))
+        quantizer = QUANTIZERS[mode].load(quantizer_path)
+        codes = np.load(codes_path, mmap_mode='r')
+
+        return cls(
+            dense.ids,
+            dense.vectors,
+            dense.jurisdictions,
+            dense.document_types,
+            dense.date_effective,
+            codes=codes,
+            quantizer=quantizer,
+            truncate_dims=truncate_dims,
+            rescore_candidates=compression.get('rescore_candidates', 100),
+            text_spans=dense.text_spans
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def search_many(
+        self,
+        embeddings: List[List[float]],
+        filters: Optional[List[Optional[Dict[str, Any]]]] = None,
+        top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        queries = _normalize(embeddings)
+        approx = self.quantizer.score(_truncate(queries, self.truncate_dims), self.codes)
+
+        filters = filters or [None] * len(queries)
+        results = []
+        for query, row_scores, query_filters in zip(queries, approx, filters):
+            candidates = self._top_k(
+                row_scores,
+                self._mask(query_filters),
+                max(top_k, self.rescore_candidates)
+            )
+            # Sorted row order keeps reads from the mapped file sequential
+            rows = np.sort(np.fromiter((row for row, _ in candidates), dtype=np.int64))
+            exact = np.asarray(self.vectors[rows]) @ query if len(rows) else np.zeros(0)
+            order = np.argsort(-exact)[:top_k]
+            results.append([self._match(rows[i], exact[i]) for i in order])
+        return results
+
+
+class VectorIndexSet:
+    """
+    Several named indexes searched as one
+
+    Each index serves the document types listed for it in rag_config.yaml;
+    queries filtered to other types skip it. Cosine scores are comparable
+    across indexes, so per-index hits are merged by score.
+    """
+
+    def __init__(self, indexes: Dict[str, DenseVectorIndex], document_types: Dict[str, List[str]]):
+        self.indexes = indexes
+        self.document_types = document_types
+
+    def search(
+        self,
+        embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        return self.search_many([embedding], filters=[filters], top_k=top_k)[0]
+
+    def search_many(
+        self,
+        embeddings: List[List[float]],
+        filters: Optional[List[Optional[Dict[str, Any]]]] = None,
+        top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        filters = filters or [None] * len(embeddings)
+        merged: List[List[Dict[str, Any]]] = [[] for _ in embeddings]
+
+        for name, index in self.indexes.items():
+            positions = [
+                i for i, query_filters in enumerate(filters)
+                if self._serves(name, query_filters)
+            ]
+            if not positions:
+                continue
+            hits = index.search_many(
+                [embeddings[i] for i in positions],
+                filters=[filters[i] for i in positions],
+                top_k=top_k
+            )
+            for i, index_hits in zip(positions, hits):
+                merged[i].extend(index_hits)
+
+        return [
+            sorted(hits, key=lambda hit: hit['score'], reverse=True)[:top_k]
+            for hits in merged
+        ]
+
+    def _serves(self, name: str, filters: Optional[Dict[str, Any]]) -> bool:
+        wanted = (filters or {}).get('document_type')
+        served = self.document_types.get(name)
+        return not wanted or not served or bool(set(wanted) & set(served))
+
+    @classmethod
+    def load(
+        cls,
+        index_dir: str,
+        index_configs: List[Dict[str, Any]],
+        corpus=None
+    ) -> "VectorIndexSet":
+        """Load every configured index present under index_dir, reading hit text from ``corpus``"""
+        indexes = {}
+        document_types = {}
+        for config in index_configs:
+            path = os.path.join(index_dir, config['name'])
+            if not os.path.isdir(path):
+                continue
+            indexes[config['name']] = load_index(path, config.get('compression'))
+            indexes[config['name']].corpus = corpus
+            document_types[config['name']] = config.get('document_types', [])
+        return cls(indexes, document_types)
+
+
+def _open_array(path: str, name: str) -> np.ndarray:
+    return np.load(os.path.join(path, name), mmap_mode='r')
+
+
+def _atomic_save(path: str, save) -> None:
+    """Write via a temp file so concurrent readers never see a partial file"""
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.{os.getpid()}.tmp{ext}"
+    save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _truncate(vectors: np.ndarray, dims: Optional[int]) -> np.ndarray:
+    """Leading dimensions, renormalized (text-embedding-3 supports truncation)"""
+    if not dims or dims >= vectors.shape[1]:
+        return vectors
+    return _normalize(vectors[:, :dims])
+
+
+def build_codes(vectors: np.ndarray, compression: Dict[str, Any]):
+    """Train a quantizer for ``compression`` and encode all vectors"""
+    quantizer_cls = QUANTIZERS[compression['mode']]
+    truncate_dims = compression.get('truncate_dims')
+    # Uniform sample across the whole index: rows are often in ingestion
+    # (e.g. state-by-state) order. Seeded so a rebuild yields the same codes;
+    # sorted so reads from the mapped file stay sequential.
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(len(vectors), min(TRAIN_SAMPLE_ROWS, len(vectors)), replace=False))
+    quantizer = quantizer_cls.train(
+        _truncate(np.asarray(vectors[rows]), truncate_dims),
+        subvectors=compression.get('pq_subvectors', 96)
+    )
+    block_rows = _block_rows(vectors.shape[1])
+    codes = np.vstack([
+        quantizer.encode(_truncate(np.asarray(vectors[start:start + block_rows]), truncate_dims))
+        for start in range(0, len(vectors), block_rows)
+    ])
+    return quantizer, codes
+
+
+def load_index(
+    path: str,
+    compression: Optional[Dict[str, Any]] = None,
+    build_missing: bool = False
+) -> DenseVectorIndex:
+    """Exact index when compression is off, two-stage quantized index otherwise"""
+    if not compression or compression.get('mode', 'none') == 'none':
+        return DenseVectorIndex.load(path)
+    return QuantizedVectorIndex.load(path, compression, build_missing=build_missing)
+
+
+def save_index(
+    path: str,
+    ids: List[str],
+    vectors: np.ndarray,
+    jurisdictions: List[str],
+    document_types: List[str],
+    date_effective: List[float],
+    text_spans: Optional[List[Tuple[int, int]]] = None
+) -> None:
+    """
+    Write an index directory; publish_snapshot() builds the compressed codes
+
+    ``text_spans`` are the TextCorpus.write() spans of each row's passage.
+    """
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'ids.npy'), np.asarray(ids, dtype=str))
+    np.save(os.path.join(path, 'vectors.f32.npy'), _normalize(vectors))
+    np.save(os.path.join(path, 'jurisdictions.npy'), np.asarray(jurisdictions, dtype=str))
+    np.save(os.path.join(path, 'document_types.npy'), np.asarray(document_types, dtype=str))
+    np.save(os.path.join(path, 'date_effective.npy'), np.asarray(date_effective, dtype=np.float64))
+    if text_spans is not None:
+        np.save(os.path.join(path, 'text_spans.npy'), np.asarray(text_spans, dtype=np.int64).reshape(-1, 2))
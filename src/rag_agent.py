@@ -3,10 +3,32 @@ Breakup-AI Legal RAG System
 Core implementation for AI agent interface to legal knowledge base
 """
 
-from typing import List, Optional, Dict, Any, Tuple
+import asyncio
+import functools
+import inspect
+import json
+import mmap
+import os
+import sys
+from concurrent.futures import Executor
+from typing import List, Optional, Dict, Any, Tuple, Iterable
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
+
+
+CITATION_NETWORK_QUERY = """
+            MATCH (c:Case {id: $case_id})-[:CITES*1..$depth]->(cited)
+            MATCH (citing)-[:CITES*1..$depth]->(c)
+            RETURN c, cited, citing
+            """
+
+# Reciprocal Rank Fusion damping constant (Cormack et al.)
+RRF_K = 60
+
+# Characters of passage text kept on cached and returned results
+EXCERPT_CHARS = 300
 
 
 class DocumentType(Enum):
@@ -27,32 +49,182 @@ class JurisdictionLevel(Enum):
     LOCAL = "local"
 
 
-@dataclass
+@dataclass(frozen=True)
 class Jurisdiction:
     """Jurisdiction metadata"""
     level: JurisdictionLevel
     state: Optional[str] = None
     county: Optional[str] = None
     court: Optional[str] = None
+    
+    @classmethod
+    def intern(
+        cls,
+        level: JurisdictionLevel,
+        state: Optional[str] = None,
+        county: Optional[str] = None,
+        court: Optional[str] = None
+    ) -> "Jurisdiction":
+        """Shared instance for this jurisdiction (documents hold references, not copies)"""
+        key = (level, state, county, court)
+        jurisdiction = _JURISDICTIONS.get(key)
+        if jurisdiction is None:
+            jurisdiction = _JURISDICTIONS.setdefault(key, cls(level, state, county, court))
+        return jurisdiction
+
+
+_JURISDICTIONS: Dict[Tuple, Jurisdiction] = {}
+
+
+def _normalize_text(text: str) -> str:
+    """Whitespace-normalized text used as a cache key"""
+    return " ".join(text.split())
+
+
+class TextCorpus:
+    """
+    Read-only memory-mapped store of UTF-8 document text
+    
+    Documents reference their text by (offset, length) in bytes, so the
+    text lives once in the page cache (shared by all workers) instead of
+    as a str in every LegalDocument.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = b''
+    
+    @staticmethod
+    def write(path: str, texts: Iterable[str]) -> List[Tuple[int, int]]:
+        """Write texts to a new corpus file and return their (offset, length) spans"""
+        spans = []
+        offset = 0
+        with open(path, 'wb') as f:
+            for text in texts:
+                data = text.encode('utf-8')
+                f.write(data)
+                spans.append((offset, len(data)))
+                offset += len(data)
+        return spans
+    
+    def read(self, offset: int, length: int) -> str:
+        """Materialize one span"""
+        return self._data[offset:offset + length].decode('utf-8', errors='ignore')
+    
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+_EMPTY_METADATA = MappingProxyType({})
 
 
-@dataclass
 class LegalDocument:
-    """Core legal document structure"""
-    document_id: str
-    document_type: DocumentType
-    title: str
-    citation: str
-    full_text: str
-    jurisdiction: Jurisdiction
-    date_published: datetime
-    date_effective: datetime
-    status: str  # active, superseded, repealed
-    metadata: Dict[str, Any]
-    summary: Optional[str] = None
-    plain_language: Optional[str] = None
-    reading_level: Optional[float] = None
-    tags: List[str] = None
+    """
+    Core legal document structure
+    
+    Compact record: attributes live in __slots__, jurisdiction, status and
+    tags are interned, and full_text may be a span in a shared TextCorpus
+    that is only decoded when accessed. Pass either full_text or
+    corpus + text_offset + text_length.
+    """
+    
+    __slots__ = (
+        'document_id', 'document_type', 'title', 'citation', 'jurisdiction',
+        'date_published', 'date_effective', 'status', 'metadata', 'summary',
+        'plain_language', 'reading_level', 'tags',
+        '_text', '_corpus', '_text_offset', '_text_length'
+    )
+    
+    def __init__(
+        self,
+        document_id: str,
+        document_type: DocumentType,
+        title: str,
+        citation: str,
+        full_text: Optional[str],
+        jurisdiction: Jurisdiction,
+        date_published: datetime,
+        date_effective: datetime,
+        status: str,  # active, superseded, repealed
+        metadata: Optional[Dict[str, Any]] = None,
+        summary: Optional[str] = None,
+        plain_language: Optional[str] = None,
+        reading_level: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None,
+        corpus: Optional[TextCorpus] = None,
+        text_offset: int = 0,
+        text_length: int = 0
+    ):
+        self.document_id = document_id
+        self.document_type = document_type
+        self.title = title
+        self.citation = citation
+        self.jurisdiction = Jurisdiction.intern(
+            jurisdiction.level,
+            jurisdiction.state,
+            jurisdiction.county,
+            jurisdiction.court
+        )
+        self.date_published = date_published
+        self.date_effective = date_effective
+        self.status = sys.intern(status)
+        # One shared read-only mapping for documents without metadata
+        self.metadata = metadata if metadata else _EMPTY_METADATA
+        self.summary = summary
+        self.plain_language = plain_language
+        self.reading_level = reading_level
+        self.tags = tuple(sys.intern(tag) for tag in tags) if tags else ()
+        self._text = full_text if corpus is None else None
+        self._corpus = corpus
+        self._text_offset = text_offset
+        self._text_length = text_length
+    
+    @property
+    def full_text(self) -> str:
+        """Document text, decoded from the corpus on each access"""
+        if self._corpus is not None:
+            return self._corpus.read(self._text_offset, self._text_length)
+        return self._text or ''
+    
+    def excerpt(self, max_chars: int = EXCERPT_CHARS) -> str:
+        """Leading text without materializing the whole document"""
+        if self._corpus is not None:
+            # UTF-8 is at most 4 bytes per character
+            text = self._corpus.read(
+                self._text_offset,
+                min(self._text_length, max_chars * 4)
+            )
+        else:
+            text = self._text or ''
+        return text[:max_chars]
+    
+    def to_dict(self, include_text: bool = False) -> Dict[str, Any]:
+        """Response representation; full text only when asked for"""
+        data = {
+            'document_id': self.document_id,
+            'document_type': self.document_type.value,
+            'title': self.title,
+            'citation': self.citation,
+            'jurisdiction': self.jurisdiction.state or self.jurisdiction.level.value,
+            'date_effective': self.date_effective.date().isoformat(),
+            'status': self.status,
+            'summary': self.summary,
+            'plain_language': self.plain_language,
+            'excerpt': self.excerpt(),
+            'tags': list(self.tags)
+        }
+        if include_text:
+            data['full_text'] = self.full_text
+        return data
+    
+    def __repr__(self) -> str:
+        return f"LegalDocument(document_id={self.document_id!r}, citation={self.citation!r})"
 
 
 @dataclass
@@ -94,6 +266,17 @@ class RAGResponse:
     timestamp: datetime
 
 
+@dataclass
+class QuerySpec:
+    """Single query in a batched request"""
+    question: str
+    jurisdiction: Optional[str] = None
+    document_types: Optional[List[DocumentType]] = None
+    date_range: Optional[Tuple[datetime, datetime]] = None
+    max_results: int = 5
+    include_plain_language: bool = True
+
+
 @dataclass
 class StateComparison:
     """Multi-state comparison"""
@@ -141,7 +324,12 @@ class LegalRAGAgent:
         metadata_db_client,
         graph_db_client,
         embedding_model,
-        llm_model
+        llm_model,
+        executor: Optional[Executor] = None,
+        reranker=None,
+        bundles=None,
+        caches=None,
+        cascade=None
     ):
         """
         Initialize RAG agent with database connections
@@ -152,12 +340,30 @@ class LegalRAGAgent:
             graph_db_client: Graph database (Neo4j)
             embedding_model: Text embedding model
             llm_model: Language model for generation
+            executor: Thread pool used by the async API for synchronous
+                clients and CPU-bound steps (defaults to the loop's executor)
+            reranker: Cross-encoder with a predict(pairs) method (optional)
+            bundles: Precompiled per-state procedure/evidence bundles (optional)
+            caches: Embedding, retrieval and plain-language caches used by
+                the async API (optional)
+            cascade: Jurisdiction cascade for tiered vector search with
+                early termination (optional; a single filtered search otherwise)
         """
         self.vector_db = vector_db_client
         self.metadata_db = metadata_db_client
         self.graph_db = graph_db_client
         self.embedder = embedding_model
         self.llm = llm_model
+        self.executor = executor
+        self.reranker = reranker
+        self.bundles = bundles
+        self.caches = caches
+        self.cascade = cascade
+        # Loop that async clients are bound to; the sync API runs their calls on it
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
         
     def query(
         self,
@@ -193,7 +399,7 @@ class LegalRAGAgent:
         intent = self._classify_intent(question, jurisdiction)
         
         # 2. Generate query embedding
-        query_embedding = self.embedder.embed(question)
+        query_embedding = self._resolve(self.embedder.embed(question))
         
         # 3. Retrieve relevant documents (hybrid search)
         vector_results = self._vector_search(
@@ -212,9 +418,12 @@ class LegalRAGAgent:
             top_k=max_results * 2
         )
         
-        # 4. Fuse and rerank results
+        # 4. Fuse and rerank results, then drop full passage text
         fused_results = self._hybrid_fusion(vector_results, keyword_results)
-        top_results = self._rerank(fused_results, question)[:max_results]
+        top_results = [
+            self._compact_result(result)
+            for result in self._rerank(fused_results, question)[:max_results]
+        ]
         
         # 5. Enrich with definitions and cross-references
         definitions = self._extract_definitions(top_results, intent)
@@ -290,6 +499,10 @@ class LegalRAGAgent:
         Example:
             >>> agent.get_procedure("protective_order", "CA")
         """
+        bundle = self._bundled_procedure(procedure_type, jurisdiction)
+        if bundle is not None:
+            return bundle
+        
         # Retrieve procedure from database
         procedure = self._get_procedure_template(procedure_type, jurisdiction)
         
@@ -374,6 +587,10 @@ class LegalRAGAgent:
         Example:
             >>> agent.get_evidence_requirements("spousal_support", "CA")
         """
+        bundle = self._bundled_evidence(claim_type, jurisdiction)
+        if bundle is not None:
+            return bundle
+        
         # Retrieve evidence standards
         standards = self._get_evidence_standards(claim_type, jurisdiction)
         
@@ -388,7 +605,7 @@ class LegalRAGAgent:
         
         return EvidenceRequirements(
             claim_type=claim_type,
-            jurisdiction=Jurisdiction(JurisdictionLevel.STATE, state=jurisdiction),
+            jurisdiction=Jurisdiction.intern(JurisdictionLevel.STATE, state=jurisdiction),
             required_evidence=standards['required'],
             optional_evidence=standards['optional'],
             admissibility_rules=admissibility,
@@ -416,11 +633,7 @@ class LegalRAGAgent:
         """
         # Query graph database
         citation_data = self.graph_db.query(
-            """
-            MATCH (c:Case {id: $case_id})-[:CITES*1..$depth]->(cited)
-            MATCH (citing)-[:CITES*1..$depth]->(c)
-            RETURN c, cited, citing
-            """,
+            CITATION_NETWORK_QUERY,
             case_id=case_id,
             depth=depth
         )
@@ -439,12 +652,514 @@ class LegalRAGAgent:
             precedential_strength=precedential_strength
         )
     
+    # Async API
+    #
+    # Mirrors the synchronous methods above for use inside an event loop.
+    # Coroutine client methods are awaited directly; synchronous clients and
+    # CPU-bound steps run on the agent's executor so a slow LLM or database
+    # call never blocks other requests on the same worker.
+    
+    async def aquery(
+        self,
+        question: str,
+        jurisdiction: Optional[str] = None,
+        document_types: Optional[List[DocumentType]] = None,
+        date_range: Optional[Tuple[datetime, datetime]] = None,
+        max_results: int = 5,
+        include_plain_language: bool = True
+    ) -> RAGResponse:
+        """
+        Async variant of query(); independent steps run concurrently
+        
+        Example:
+            >>> await agent.aquery("What is community property in California?", jurisdiction="CA")
+        """
+        responses = await self.aquery_many([
+            QuerySpec(
+                question=question,
+                jurisdiction=jurisdiction,
+                document_types=document_types,
+                date_range=date_range,
+                max_results=max_results,
+                include_plain_language=include_plain_language
+            )
+        ])
+        if isinstance(responses[0], BaseException):
+            raise responses[0]
+        return responses[0]
+    
+    async def aquery_many(self, specs: List[QuerySpec]) -> List[RAGResponse]:
+        """
+        Answer several queries with shared model calls
+        
+        All questions are embedded in one call, vector searched in one
+        search_many() pass when the vector client supports it, and reranked
+        in a single cross-encoder batch. Per-query steps (intent, keyword
+        search, enrichment) still run concurrently.
+        
+        Errors are kept per query: a query whose intent or enrichment fails
+        gets its exception in place of a response and the others still
+        succeed. Only a failure of the shared retrieval step fails them all.
+        
+        Args:
+            specs: Queries to answer
+            
+        Returns:
+            One RAGResponse (or the exception it failed with) per spec, in order
+        """
+        if not specs:
+            return []
+        
+        # 1. Intent classification alongside retrieval
+        intents, ranked_results = await asyncio.gather(
+            asyncio.gather(*[
+                self._aclassify_intent(spec.question, spec.jurisdiction)
+                for spec in specs
+            ], return_exceptions=True),
+            self._aretrieve_many(specs),
+            return_exceptions=True
+        )
+        if isinstance(ranked_results, BaseException):
+            return [ranked_results] * len(specs)
+        
+        # 5-8. Enrichment, guidance, plain language and confidence
+        classified = [i for i, intent in enumerate(intents) if not isinstance(intent, BaseException)]
+        finished = await asyncio.gather(*[
+            self._afinish_query(specs[i], intents[i], ranked_results[i][:specs[i].max_results])
+            for i in classified
+        ], return_exceptions=True)
+        
+        # Failed intents keep their exception in place
+        responses = list(intents)
+        for i, response in zip(classified, finished):
+            responses[i] = response
+        return responses
+    
+    async def _aretrieve_many(self, specs: List[QuerySpec]) -> List[List[Dict[str, Any]]]:
+        """Ranked results per spec, from the retrieval cache where possible"""
+        keys = [self._retrieval_key(spec) for spec in specs]
+        ranked: List[Optional[List[Dict[str, Any]]]] = [
+            self.caches.retrieval.get(key) if self.caches is not None and key else None
+            for key in keys
+        ]
+        misses = [i for i, results in enumerate(ranked) if results is None]
+        if not misses:
+            return ranked
+        
+        miss_specs = [specs[i] for i in misses]
+        questions = [spec.question for spec in miss_specs]
+        top_k = max(spec.max_results for spec in miss_specs) * 2
+        
+        # 2. One batched embedding call
+        query_embeddings = await self._aembed_many(questions)
+        
+        # 3. Hybrid search legs run side by side
+        vector_results, keyword_results = await asyncio.gather(
+            self._acascade_search_many(query_embeddings, miss_specs, top_k),
+            asyncio.gather(*[
+                self._call(
+                    self._keyword_search,
+                    spec.question,
+                    spec.jurisdiction,
+                    spec.document_types,
+                    spec.date_range,
+                    top_k=spec.max_results * 2
+                )
+                for spec in miss_specs
+            ])
+        )
+        
+        # 4. Fuse and rerank all query/result pairs in one batch
+        fused_results = await asyncio.gather(*[
+            self._call(self._hybrid_fusion, vector[:spec.max_results * 2], keyword)
+            for spec, vector, keyword in zip(miss_specs, vector_results, keyword_results)
+        ])
+        reranked = await self._call(self._rerank_many, fused_results, questions)
+        
+        for i, results in zip(misses, reranked):
+            # Only the excerpt is kept once reranking has read the full passage
+            results = [self._compact_result(result) for result in results]
+            ranked[i] = results
+            # Date-filtered queries are too specific to be worth caching
+            if self.caches is not None and keys[i]:
+                self.caches.retrieval.set(keys[i], results)
+        return ranked
+    
+    def _retrieval_key(self, spec: QuerySpec) -> Optional[str]:
+        """Retrieval cache key, or None for uncacheable specs"""
+        if spec.date_range:
+            return None
+        document_types = ",".join(sorted(dt.value for dt in spec.document_types or []))
+        # Scoped to the live index snapshot so a publish never serves stale hits
+        version = getattr(self.vector_db, "version", None)
+        return "|".join([
+            version or "",
+            spec.jurisdiction or "",
+            document_types,
+            str(spec.max_results),
+            _normalize_text(spec.question)
+        ])
+    
+    async def aprewarm(self, specs: List[QuerySpec]) -> int:
+        """
+        Populate the caches for likely queries
+        
+        Embeds and retrieves every spec, then translates the top results
+        to plain language so first requests after a deploy are warm.
+        
+        Returns:
+            Number of plain-language texts prepared
+        """
+        ranked_results = await self._aretrieve_many(specs)
+        texts = {
+            self._result_text(result)
+            for spec, results in zip(specs, ranked_results)
+            for result in results[:spec.max_results]
+        }
+        texts.discard('')
+        await asyncio.gather(*[
+            self._atranslate_to_plain_language(text) for text in texts
+        ])
+        return len(texts)
+    
+    async def _afinish_query(
+        self,
+        spec: QuerySpec,
+        intent: Dict,
+        top_results: List[Dict[str, Any]]
+    ) -> RAGResponse:
+        """Enrich ranked results and assemble the response for one query"""
+        definitions, cross_refs, next_steps = await asyncio.gather(
+            self._call(self._extract_definitions, top_results, intent),
+            self._call(self._get_cross_references, top_results),
+            self._agenerate_next_steps(intent, top_results)
+        )
+        
+        if spec.include_plain_language:
+            top_results = await self._aadd_plain_language(top_results)
+        
+        confidence = self._calculate_confidence(top_results, intent)
+        
+        return RAGResponse(
+            query=spec.question,
+            intent=intent,
+            results=top_results,
+            related_definitions=definitions,
+            cross_references=cross_refs,
+            procedural_next_steps=next_steps,
+            confidence_score=confidence,
+            sources_count=len(top_results),
+            timestamp=datetime.now()
+        )
+    
+    async def aget_definition(
+        self,
+        term: str,
+        jurisdiction: Optional[str] = None,
+        plain_language: bool = True
+    ) -> Definition:
+        """Async variant of get_definition()"""
+        definition = await self._call(self._search_definitions, term, jurisdiction)
+        
+        if plain_language and not definition.plain_language:
+            definition.plain_language = await self._atranslate_to_plain_language(
+                definition.definition
+            )
+        
+        return definition
+    
+    async def aget_procedure(
+        self,
+        procedure_type: str,
+        jurisdiction: str
+    ) -> Procedure:
+        """Async variant of get_procedure(); the three lookups run concurrently"""
+        bundle = self._bundled_procedure(procedure_type, jurisdiction)
+        if bundle is not None:
+            return bundle
+        
+        procedure, forms, statutes = await asyncio.gather(
+            self._call(self._get_procedure_template, procedure_type, jurisdiction),
+            self._call(self._get_current_forms, procedure_type, jurisdiction),
+            self._call(self._get_governing_law, procedure_type, jurisdiction)
+        )
+        
+        procedure.required_forms = forms
+        procedure.governing_statutes = statutes
+        
+        return procedure
+    
+    async def acompare_states(
+        self,
+        concept: str,
+        states: List[str]
+    ) -> StateComparison:
+        """Async variant of compare_states(); per-state queries run concurrently"""
+        state_results = await asyncio.gather(*[
+            self.aquery(
+                f"{concept} in {state}",
+                jurisdiction=state,
+                max_results=3
+            )
+            for state in states
+        ])
+        
+        comparisons = {}
+        
+        for state, state_rules in zip(states, state_results):
+            comparisons[state] = {
+                'system': self._identify_system(state_rules, concept),
+                'key_rules': self._extract_key_rules(state_rules),
+                'statutes': self._extract_citations(state_rules),
+                'unique_features': self._identify_unique_features(state_rules)
+            }
+        
+        key_differences, recommendations = await asyncio.gather(
+            self._call(self._analyze_differences, comparisons, concept),
+            self._call(
+                self._generate_jurisdiction_recommendations,
+                comparisons,
+                concept
+            )
+        )
+        
+        return StateComparison(
+            concept=concept,
+            states=states,
+            comparisons=comparisons,
+            key_differences=key_differences,
+            recommendations=recommendations
+        )
+    
+    async def aget_evidence_requirements(
+        self,
+        claim_type: str,
+        jurisdiction: str
+    ) -> EvidenceRequirements:
+        """Async variant of get_evidence_requirements(); lookups run concurrently"""
+        bundle = self._bundled_evidence(claim_type, jurisdiction)
+        if bundle is not None:
+            return bundle
+        
+        standards, admissibility, preservation, examples = await asyncio.gather(
+            self._call(self._get_evidence_standards, claim_type, jurisdiction),
+            self._call(self._get_admissibility_rules, jurisdiction),
+            self._call(self._generate_preservation_guidelines, claim_type),
+            self._call(self._get_evidence_examples, claim_type)
+        )
+        
+        return EvidenceRequirements(
+            claim_type=claim_type,
+            jurisdiction=Jurisdiction.intern(JurisdictionLevel.STATE, state=jurisdiction),
+            required_evidence=standards['required'],
+            optional_evidence=standards['optional'],
+            admissibility_rules=admissibility,
+            preservation_guidelines=preservation,
+            examples=examples
+        )
+    
+    async def aanalyze_citation_network(
+        self,
+        case_id: str,
+        depth: int = 2
+    ) -> CitationGraph:
+        """Async variant of analyze_citation_network()"""
+        citation_data = await self._call(
+            self.graph_db.query,
+            CITATION_NETWORK_QUERY,
+            case_id=case_id,
+            depth=depth
+        )
+        
+        precedential_strength = await self._call(
+            self._calculate_precedential_weight,
+            citation_data
+        )
+        
+        return CitationGraph(
+            case_id=case_id,
+            cited_by=citation_data['citing_cases'],
+            cites=citation_data['cited_cases'],
+            related_cases=citation_data['related'],
+            depth=depth,
+            precedential_strength=precedential_strength
+        )
+    
     # Private helper methods
     
+    async def _call(self, fn, *args, **kwargs):
+        """Await coroutine functions; run anything else on the executor"""
+        if inspect.iscoroutinefunction(fn):
+            return await fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(fn, *args, **kwargs)
+        )
+    
+    def _resolve(self, result):
+        """
+        Result of a client call made from the sync API
+        
+        Async clients (the LLM gateway, pooled HTTP clients) return
+        coroutines; those run on the loop the agent was created on, or on a
+        fresh loop when there is none. Calling the sync API from that loop's
+        own thread would deadlock, so that raises instead.
+        """
+        if not inspect.isawaitable(result):
+            return result
+        if self._loop is None or not self._loop.is_running():
+            return asyncio.run(result)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            result.close()
+            raise RuntimeError("Sync LegalRAGAgent API called on the event loop; use the async variant")
+        return asyncio.run_coroutine_threadsafe(result, self._loop).result()
+    
+    def _bundled_procedure(self, procedure_type: str, jurisdiction: str) -> Optional[Procedure]:
+        """Precompiled procedure from the bundle snapshot, if loaded"""
+        if self.bundles is None:
+            return None
+        return self.bundles.procedure(procedure_type, jurisdiction)
+    
+    def _bundled_evidence(self, claim_type: str, jurisdiction: str) -> Optional[EvidenceRequirements]:
+        """Precompiled evidence requirements from the bundle snapshot, if loaded"""
+        if self.bundles is None:
+            return None
+        return self.bundles.evidence(claim_type, jurisdiction)
+    
+    async def _aclassify_intent(self, question: str, jurisdiction: Optional[str]) -> Dict:
+        """Async intent classification"""
+        return await self._call(
+            self.llm.generate_json,
+            self._intent_prompt(question, jurisdiction)
+        )
+    
+    async def _aembed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts, cached, in one call when the embedder supports it"""
+        keys = [_normalize_text(text) for text in texts]
+        embeddings = [
+            self.caches.embeddings.get(key) if self.caches is not None else None
+            for key in keys
+        ]
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not misses:
+            return embeddings
+        
+        miss_texts = [texts[i] for i in misses]
+        embed_many = getattr(self.embedder, 'embed_many', None)
+        if embed_many is not None:
+            computed = await self._call(embed_many, miss_texts)
+        else:
+            computed = await asyncio.gather(*[
+                self._call(self.embedder.embed, text) for text in miss_texts
+            ])
+        
+        for i, embedding in zip(misses, computed):
+            embeddings[i] = embedding
+            if self.caches is not None:
+                self.caches.embeddings.set(keys[i], embedding)
+        return embeddings
+    
+    async def _avector_search_many(self, embeddings, filters, top_k):
+        """Semantic vector search for several queries"""
+        search_many = getattr(self.vector_db, 'search_many', None)
+        if search_many is not None:
+            return await self._call(search_many, embeddings, filters=filters, top_k=top_k)
+        return await asyncio.gather(*[
+            self._call(self.vector_db.search, embedding, filters=query_filters, top_k=top_k)
+            for embedding, query_filters in zip(embeddings, filters)
+        ])
+    
+    async def _acascade_search_many(self, embeddings, specs: List[QuerySpec], top_k: int):
+        """
+        Vector search tier by tier (user state, federal, neighbors)
+        
+        Each round searches the next tier for every query still short of
+        confident hits, in one batched call; queries drop out as soon as
+        they are satisfied.
+        """
+        if self.cascade is None:
+            return await self._avector_search_many(
+                embeddings,
+                [
+                    self._vector_filters(spec.jurisdiction, spec.document_types, spec.date_range)
+                    for spec in specs
+                ],
+                top_k=top_k
+            )
+        
+        tiers = [self.cascade.tiers(spec.jurisdiction) for spec in specs]
+        hits: List[List[Dict[str, Any]]] = [[] for _ in specs]
+        pending = list(range(len(specs)))
+        depth = 0
+        while pending:
+            searching = [i for i in pending if depth < len(tiers[i])]
+            if not searching:
+                break
+            matches = await self._avector_search_many(
+                [embeddings[i] for i in searching],
+                [
+                    self._vector_filters(
+                        tiers[i][depth].jurisdiction,
+                        specs[i].document_types,
+                        specs[i].date_range
+                    )
+                    for i in searching
+                ],
+                top_k=top_k
+            )
+            for i, tier_matches in zip(searching, matches):
+                hits[i] = self.cascade.merge(
+                    hits[i],
+                    self.cascade.rescore(tier_matches, tiers[i][depth])
+                )
+            pending = [
+                i for i in searching
+                if not self.cascade.satisfied(hits[i], specs[i].max_results)
+            ]
+            depth += 1
+        return [query_hits[:top_k] for query_hits in hits]
+    
+    async def _aadd_plain_language(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Translate each result passage, served from the plain-language cache aprewarm() fills"""
+        texts = [self._result_text(result) for result in results]
+        translations = await asyncio.gather(*[
+            self._atranslate_to_plain_language(text) for text in texts if text
+        ])
+        translated = iter(translations)
+        return [
+            dict(result, plain_language=next(translated)) if text else result
+            for result, text in zip(results, texts)
+        ]
+    
+    async def _atranslate_to_plain_language(self, legal_text: str) -> str:
+        """Async plain English translation, cached by source text"""
+        key = _normalize_text(legal_text)
+        if self.caches is not None:
+            cached = self.caches.plain_language.get(key)
+            if cached is not None:
+                return cached
+        
+        plain = await self._call(
+            self.llm.generate,
+            self._plain_language_prompt(legal_text)
+        )
+        if self.caches is not None:
+            self.caches.plain_language.set(key, plain)
+        return plain
+    
     def _classify_intent(self, question: str, jurisdiction: Optional[str]) -> Dict:
         """Classify user intent from question"""
         # Use LLM to classify intent
-        prompt = f"""
+        return self._resolve(self.llm.generate_json(self._intent_prompt(question, jurisdiction)))
+    
+    def _intent_prompt(self, question: str, jurisdiction: Optional[str]) -> str:
+        """Build the intent classification prompt"""
+        return f"""
         Classify the following legal question:
         Question: {question}
         Jurisdiction: {jurisdiction or 'Not specified'}
@@ -457,10 +1172,31 @@ class LegalRAGAgent:
         
         Return JSON format.
         """
-        return self.llm.generate_json(prompt)
     
     def _vector_search(self, embedding, jurisdiction, doc_types, date_range, top_k):
-        """Semantic vector search"""
+        """Semantic vector search, cascaded by jurisdiction tier when configured"""
+        if self.cascade is None:
+            return self._resolve(self.vector_db.search(
+                embedding,
+                filters=self._vector_filters(jurisdiction, doc_types, date_range),
+                top_k=top_k
+            ))
+        
+        hits = []
+        for tier in self.cascade.tiers(jurisdiction):
+            matches = self._resolve(self.vector_db.search(
+                embedding,
+                filters=self._vector_filters(tier.jurisdiction, doc_types, date_range),
+                top_k=top_k
+            ))
+            hits = self.cascade.merge(hits, self.cascade.rescore(matches, tier))
+            # top_k is max_results * 2 on this path
+            if self.cascade.satisfied(hits, max(top_k // 2, 1)):
+                break
+        return hits[:top_k]
+    
+    def _vector_filters(self, jurisdiction, doc_types, date_range) -> Dict:
+        """Build vector search metadata filters (jurisdiction may be a list of codes)"""
         filters = {}
         if jurisdiction:
             filters['jurisdiction'] = jurisdiction
@@ -468,12 +1204,7 @@ class LegalRAGAgent:
             filters['document_type'] = [dt.value for dt in doc_types]
         if date_range:
             filters['date_range'] = date_range
-            
-        return self.vector_db.search(
-            embedding,
-            filters=filters,
-            top_k=top_k
-        )
+        return filters
     
     def _keyword_search(self, question, jurisdiction, doc_types, date_range, top_k):
         """BM25 keyword search"""
@@ -482,13 +1213,68 @@ class LegalRAGAgent:
     
     def _hybrid_fusion(self, vector_results, keyword_results):
         """Fuse vector and keyword search results"""
-        # Reciprocal Rank Fusion
-        pass
+        # Reciprocal Rank Fusion: each list contributes 1 / (RRF_K + rank)
+        fused: Dict[str, Dict[str, Any]] = {}
+        for results in (vector_results, keyword_results):
+            for rank, result in enumerate(results or [], start=1):
+                key = result.get('id') or self._result_text(result)
+                entry = fused.get(key)
+                if entry is None:
+                    # First list to return a hit keeps its scores and metadata
+                    entry = fused[key] = dict(result, fusion_score=0.0)
+                entry['fusion_score'] += 1.0 / (RRF_K + rank)
+        return sorted(fused.values(), key=lambda result: result['fusion_score'], reverse=True)
     
     def _rerank(self, results, question):
         """Rerank results using cross-encoder"""
         # Cross-encoder reranking for better relevance
-        pass
+        return self._rerank_many([results], [question])[0]
+    
+    def _rerank_many(self, results_per_query, questions):
+        """Rerank several result lists with a single cross-encoder batch"""
+        results_per_query = [list(results or []) for results in results_per_query]
+        if self.reranker is None:
+            return results_per_query
+        
+        pairs = [
+            (question, self._result_text(result))
+            for question, results in zip(questions, results_per_query)
+            for result in results
+        ]
+        if not pairs:
+            return results_per_query
+        scores = iter(self.reranker.predict(pairs))
+        
+        reranked = []
+        for results in results_per_query:
+            scored = [dict(result, rerank_score=float(next(scores))) for result in results]
+            scored.sort(key=lambda result: result['rerank_score'], reverse=True)
+            reranked.append(scored)
+        return reranked
+    
+    def _result_text(self, result) -> str:
+        """Passage text used for reranking, or the excerpt of a compacted result"""
+        return (
+            result.get('text')
+            or result.get('metadata', {}).get('text')
+            or result.get('excerpt', '')
+        )
+    
+    def _compact_result(self, result) -> Dict[str, Any]:
+        """
+        Result with its passage text cut to an EXCERPT_CHARS excerpt
+        
+        Vector DB hits carry the whole passage in metadata.text; holding
+        that in the retrieval cache and query_history costs far more than
+        responses need.
+        """
+        text = self._result_text(result)
+        compact = {key: value for key, value in result.items() if key != 'text'}
+        metadata = result.get('metadata')
+        if metadata and 'text' in metadata:
+            compact['metadata'] = {key: value for key, value in metadata.items() if key != 'text'}
+        compact['excerpt'] = text[:EXCERPT_CHARS]
+        return compact
     
     def _extract_definitions(self, results, intent):
         """Extract relevant legal definitions"""
@@ -500,19 +1286,76 @@ class LegalRAGAgent:
     
     def _generate_next_steps(self, intent, results):
         """Generate procedural next steps"""
-        pass
+        return self._parse_next_steps(
+            self._resolve(self.llm.generate_json(self._next_steps_prompt(intent, results)))
+        )
+    
+    async def _agenerate_next_steps(self, intent, results) -> List[str]:
+        """Async procedural next steps through the LLM (coalesced and cached by the gateway)"""
+        reply = await self._call(
+            self.llm.generate_json,
+            self._next_steps_prompt(intent, results)
+        )
+        return self._parse_next_steps(reply)
+    
+    def _next_steps_prompt(self, intent, results) -> str:
+        """Build the procedural next-steps prompt"""
+        sources = "\n".join(
+            f"- {result.get('metadata', {}).get('citation') or result.get('id', '')}: "
+            f"{self._result_text(result)[:300]}"
+            for result in results or []
+        )
+        return f"""
+        Based on this legal question analysis and the sources found, list the
+        practical next steps the person should take.
+        
+        Question analysis: {json.dumps(intent, default=str, sort_keys=True)}
+        
+        Sources:
+        {sources or '- none'}
+        
+        Requirements:
+        - At most 5 short, concrete steps in order
+        - Return an empty list if no procedural steps apply
+        
+        Return JSON format: {{"steps": ["..."]}}
+        """
+    
+    def _parse_next_steps(self, reply) -> List[str]:
+        """Steps from the LLM's JSON reply"""
+        steps = reply.get('steps', []) if isinstance(reply, dict) else reply
+        return [str(step) for step in steps or []]
     
     def _add_plain_language(self, results):
-        """Add plain language translations"""
-        pass
+        """Add plain language translations (sync counterpart of _aadd_plain_language)"""
+        translated = []
+        for result in results or []:
+            text = self._result_text(result)
+            translated.append(
+                dict(result, plain_language=self._translate_to_plain_language(text)) if text else result
+            )
+        return translated
     
     def _calculate_confidence(self, results, intent):
         """Calculate response confidence score"""
         pass
     
     def _translate_to_plain_language(self, legal_text: str) -> str:
-        """Translate legal text to plain English"""
-        prompt = f"""
+        """Translate legal text to plain English, sharing the async path's cache"""
+        key = _normalize_text(legal_text)
+        if self.caches is not None:
+            cached = self.caches.plain_language.get(key)
+            if cached is not None:
+                return cached
+        
+        plain = self._resolve(self.llm.generate(self._plain_language_prompt(legal_text)))
+        if self.caches is not None:
+            self.caches.plain_language.set(key, plain)
+        return plain
+    
+    def _plain_language_prompt(self, legal_text: str) -> str:
+        """Build the plain English translation prompt"""
+        return f"""
         Translate this legal text to plain English at an 8th grade reading level:
         
         Legal text: {legal_text}
@@ -524,7 +1367,6 @@ class LegalRAGAgent:
         - Maintain accuracy
         - Include examples if helpful
         """
-        return self.llm.generate(prompt)
     
     def _search_definitions(self, term, jurisdiction):
         """Search definition database"""